@@ -0,0 +1,77 @@
+from django.contrib import admin, messages
+from django.contrib.auth import get_permission_codename
+from django.db.models import OuterRef, Subquery
+
+from .models import DeletionProgress, Task
+from .paginator import CachedCountPaginator
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'status', 'attempts', 'run_after')
+    paginator = CachedCountPaginator
+    show_full_result_count = False
+    list_filter = ('status',)
+    search_fields = ('name',)
+
+
+class BackgroundDeleteMixin:
+    """Удаление через фоновую задачу вместо delete() в запросе админки.
+
+    Подкласс определяет метод schedule_deletion(obj), а в
+    cascade_models перечисляет модели, записи которых удаляются вместе
+    с объектом: на них нужно право удаления. Страница подтверждения не
+    обходит все связанные записи. Ход удаления берётся из
+    DeletionProgress тем же запросом, что и список.
+    """
+    cascade_models = ()
+
+    def get_queryset(self, request):
+        progress = DeletionProgress.objects.filter(
+            model=self.model._meta.label_lower, object_id=OuterRef('pk')
+        )
+        return super().get_queryset(request).annotate(
+            deletion_deleted=Subquery(progress.values('deleted')[:1]),
+            deletion_done=Subquery(progress.values('done')[:1]),
+        )
+
+    def deletion_progress(self, obj):
+        if obj.deletion_deleted is None:
+            return None
+        return {'deleted': obj.deletion_deleted, 'done': obj.deletion_done}
+
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        model_count = {self.model._meta.verbose_name_plural: len(objs)}
+        perms_needed = {
+            model._meta.verbose_name for model in self.cascade_models
+            if not request.user.has_perm('{}.{}'.format(
+                model._meta.app_label,
+                get_permission_codename('delete', model._meta)
+            ))
+        }
+        return [str(obj) for obj in objs], model_count, perms_needed, []
+
+    def delete_model(self, request, obj):
+        self.schedule_deletion(obj)
+        self.message_user(
+            request,
+            f'Удаление «{obj}» поставлено в очередь, связанные записи '
+            'удаляются в фоне',
+            messages.INFO
+        )
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            self.delete_model(request, obj)
+
+    def deletion_status(self, obj):
+        progress = self.deletion_progress(obj)
+        if progress is None:
+            return None
+        if progress['done']:
+            return 'удалено'
+        return f'удаляется: {progress["deleted"]}'
+    deletion_status.short_description = 'удаление'
+
+
+admin.site.register(Task, TaskAdmin)
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.tasks import purge_done, run_pending
+
+
+class Command(BaseCommand):
+    help = 'Фоновый обработчик очереди задач'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и выйти'
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста'
+        )
+        parser.add_argument(
+            '--batch', type=int, default=100,
+            help='Сколько задач забирать за один проход'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            done = run_pending(options['batch'])
+            if done:
+                self.stdout.write(f'Выполнено задач: {done}')
+            if options['once'] and done < options['batch']:
+                break
+            if not done:
+                purge_done()
+                time.sleep(options['sleep'])
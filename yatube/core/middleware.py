@@ -0,0 +1,130 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from gzip import compress as gzip_compress
+
+from django.utils.cache import has_vary_header, patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_sequence
+
+from yatube.settings import COMPRESSION_CACHE_SIZE, COMPRESSION_MIN_LENGTH
+
+from .serving import choose_encoding
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Эти форматы уже сжаты, повторное сжатие только тратит процессор
+SKIP_TYPES = re.compile(
+    r'^(image/(?!svg)|video/|audio/|application/(zip|gzip|x-brotli|pdf))'
+)
+
+
+def negotiate(request):
+    names = ('br', 'gzip') if brotli is not None else ('gzip',)
+    return choose_encoding(request, names)
+
+
+def shared_body(request, response):
+    """Тело одинаково для всех посетителей, и его сжатую копию есть
+    смысл держать в LRU: ответ не зависит от cookie или пользователь
+    анонимен."""
+    if not has_vary_header(response, 'Cookie'):
+        return True
+    user = getattr(request, 'user', None)
+    return user is not None and not user.is_authenticated
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data)
+    return gzip_compress(data, compresslevel=6)
+
+
+def compress_stream(sequence, encoding):
+    if encoding == 'gzip':
+        yield from compress_sequence(sequence)
+        return
+    compressor = brotli.Compressor()
+    for item in sequence:
+        data = compressor.process(item)
+        data += compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressedCache:
+    """Небольшой LRU сжатых ответов: одинаковое тело (например, из
+    закэшированного фрагмента) сжимается только один раз."""
+
+    def __init__(self, size):
+        self.size = size
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, data, encoding):
+        key = (hashlib.md5(data).digest(), encoding)
+        with self.lock:
+            if key in self.items:
+                self.items.move_to_end(key)
+                return self.items[key]
+        packed = compress(data, encoding)
+        with self.lock:
+            self.items[key] = packed
+            if len(self.items) > self.size:
+                self.items.popitem(last=False)
+        return packed
+
+
+compressed_cache = CompressedCache(COMPRESSION_CACHE_SIZE)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Сжимает ответы brotli или gzip, в том числе потоковые.
+
+    Пропускает маленькие, уже сжатые и уже закодированные ответы,
+    а также страницы с CSRF-токеном: сжатие секрета рядом с данными
+    из запроса открывает атаку BREACH.
+    """
+
+    def process_response(self, request, response):
+        # Диапазон байтов нельзя сжимать отдельно от всего файла
+        if (
+            response.has_header('Content-Encoding')
+            or response.has_header('Content-Range')
+        ):
+            return response
+        if SKIP_TYPES.match(response.get('Content-Type', '')):
+            return response
+        if request.META.get('CSRF_COOKIE_USED'):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate(request)
+        if encoding is None:
+            return response
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, encoding
+            )
+            del response['Content-Length']
+        else:
+            if len(response.content) < COMPRESSION_MIN_LENGTH:
+                return response
+            if shared_body(request, response):
+                packed = compressed_cache.get(response.content, encoding)
+            else:
+                packed = compress(response.content, encoding)
+            if len(packed) >= len(response.content):
+                return response
+            response.content = packed
+            response['Content-Length'] = str(len(packed))
+        # Сжатое тело отличается побайтно: сильный ETag делаем слабым
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-19 20:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionProgress',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100, verbose_name='модель')),
+                ('object_id', models.PositiveIntegerField(verbose_name='id объекта')),
+                ('deleted', models.PositiveIntegerField(default=0, verbose_name='удалено записей')),
+                ('done', models.BooleanField(default=False, verbose_name='завершено')),
+                ('updated', models.DateTimeField(verbose_name='дата изменения')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='deletionprogress',
+            constraint=models.UniqueConstraint(fields=('model', 'object_id'), name='unique_deletion_progress'),
+        ),
+    ]
@@ -11,3 +11,100 @@ class CreatedModel(models.Model):
     class Meta:
         # Это абстрактная модель:
         abstract = True
+
+
+class UpdatedQuerySet(models.QuerySet):
+    def last_modified(self):
+        """Время последнего изменения среди записей выборки."""
+        return self.aggregate(last=models.Max('updated'))['last']
+
+    def version(self):
+        """Версия выборки для ETag и ключей кэша.
+
+        Учитывает и количество записей, чтобы удаление тоже меняло версию.
+        """
+        stats = self.aggregate(
+            last=models.Max('updated'), total=models.Count('pk')
+        )
+        if stats['last'] is None:
+            return '0'
+        return '{}-{}'.format(
+            int(stats['last'].timestamp() * 1000000), stats['total']
+        )
+
+
+class UpdatedModel(models.Model):
+    """Абстрактная модель. Добавляет дату изменения."""
+    updated = models.DateTimeField(
+        'дата изменения',
+        auto_now=True,
+        db_index=True
+    )
+
+    objects = UpdatedQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    @property
+    def version(self):
+        """Версия записи: меняется при каждом сохранении."""
+        return str(int(self.updated.timestamp() * 1000000))
+
+
+class Task(CreatedModel):
+    """Отложенная задача для фонового обработчика."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'ожидает'),
+        (RUNNING, 'выполняется'),
+        (DONE, 'выполнена'),
+        (FAILED, 'ошибка'),
+    )
+
+    name = models.CharField('задача', max_length=200)
+    payload = models.TextField('аргументы', default='{}')
+    status = models.CharField(
+        'статус', max_length=10, choices=STATUSES, default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField('попыток', default=0)
+    run_after = models.DateTimeField('не раньше')
+    last_error = models.TextField('последняя ошибка', blank=True)
+
+    class Meta:
+        ordering = ['pk']
+        indexes = [
+            models.Index(
+                fields=['status', 'run_after'], name='task_queue_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.name} [{self.status}]'
+
+
+class DeletionProgress(models.Model):
+    """Ход фонового удаления объекта.
+
+    Хранится в базе, а не в кэше: задачи выполняет отдельный процесс,
+    и его локальный кэш админке не виден.
+    """
+    model = models.CharField('модель', max_length=100)
+    object_id = models.PositiveIntegerField('id объекта')
+    deleted = models.PositiveIntegerField('удалено записей', default=0)
+    done = models.BooleanField('завершено', default=False)
+    updated = models.DateTimeField('дата изменения')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['model', 'object_id'],
+                name='unique_deletion_progress'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.model} {self.object_id}: {self.deleted}'
@@ -0,0 +1,30 @@
+import hashlib
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+from yatube.settings import ADMIN_COUNT_TIMEOUT
+
+
+class CachedCountPaginator(Paginator):
+    """Пагинатор, который считает COUNT(*) не чаще раза в
+    ADMIN_COUNT_TIMEOUT секунд для одного и того же запроса.
+
+    На больших таблицах число записей в админке может немного
+    отставать, зато страницы списка не ждут полного подсчёта.
+    """
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is None:
+            return super().count
+        key = 'paginator:count:{}'.format(
+            hashlib.md5(str(query).encode()).hexdigest()
+        )
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, ADMIN_COUNT_TIMEOUT)
+        return count
@@ -0,0 +1,88 @@
+"""Ограничение частоты запросов к изменяющим данные страницам.
+
+Счётчики хранятся в общем кэше и увеличиваются атомарно (cache.incr).
+Оценка использует скользящее окно из двух соседних фиксированных окон:
+прошлое окно учитывается пропорционально оставшейся в нём доле времени.
+"""
+import logging
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60)"""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+def client_ip(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def hit(key, limit, period):
+    """Учитывает запрос и сообщает, превышен ли лимит."""
+    now = time.time()
+    window = int(now // period)
+    current = f'{key}:{window}'
+    # add не перезапишет уже существующий счётчик
+    cache.add(current, 0, period * 2)
+    count = cache.incr(current)
+    previous = cache.get(f'{key}:{window - 1}', 0)
+    elapsed = now / period - window
+    return previous * (1 - elapsed) + count > limit
+
+
+def throttled_key(scope):
+    return f'ratelimit:throttled:{scope}'
+
+
+def throttled_count(scope):
+    """Сколько запросов отклонено для области (метрика)."""
+    return cache.get(throttled_key(scope), 0)
+
+
+def is_limited(request, scope):
+    limits = settings.RATELIMITS.get(scope, {})
+    idents = {'ip': client_ip(request)}
+    if request.user.is_authenticated:
+        idents['user'] = request.user.pk
+    limited = False
+    for kind, rate in limits.items():
+        if kind not in idents:
+            continue
+        limit, period = parse_rate(rate)
+        key = f'ratelimit:{scope}:{kind}:{idents[kind]}'
+        limited = hit(key, limit, period) or limited
+    return limited
+
+
+def ratelimit(scope, methods=None):
+    """Декоратор view: ограничивает частоту запросов по settings.RATELIMITS.
+
+    methods - для каких HTTP-методов действует лимит (по умолчанию всех).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (
+                settings.RATELIMIT_ENABLED
+                and (methods is None or request.method in methods)
+                and is_limited(request, scope)
+            ):
+                cache.add(throttled_key(scope), 0, None)
+                cache.incr(throttled_key(scope))
+                logger.warning(
+                    'Превышен лимит %s: %s', scope, client_ip(request)
+                )
+                return render(request, 'core/429.html', status=429)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
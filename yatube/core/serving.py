@@ -0,0 +1,184 @@
+"""Отдача статики и медиафайлов без DEBUG."""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (FileResponse, Http404, HttpResponse,
+                         StreamingHttpResponse)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+# Имя с хэшем от ManifestStaticFilesStorage: style.0123456789ab.css
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^/]+$')
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+SHORT = 'public, max-age=3600'
+
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def accepted_encodings(request):
+    """Разбирает Accept-Encoding в словарь {кодировка: q}."""
+    accepted = {}
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    for item in header.split(','):
+        name, *params = item.split(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+def choose_encoding(request, names):
+    """Лучшая из names по Accept-Encoding.
+
+    q=0 означает отказ от кодировки, '*' покрывает не названные явно;
+    при равных q побеждает та, что раньше в names.
+    """
+    accepted = accepted_encodings(request)
+    best, best_quality = None, 0
+    for name in names:
+        quality = accepted.get(name, accepted.get('*', 0))
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+def resolve(root, path):
+    try:
+        fullpath = safe_join(root, path)
+    except SuspiciousFileOperation:
+        raise Http404('Файл не найден')
+    if not os.path.isfile(fullpath):
+        raise Http404('Файл не найден')
+    return fullpath
+
+
+def serve_static(request, path):
+    """Отдаёт собранную статику из STATIC_ROOT.
+
+    Файлы с хэшем в имени кэшируются браузером навсегда; если клиент
+    принимает сжатие и есть заранее сжатая копия, отдаётся она.
+    """
+    fullpath = resolve(settings.STATIC_ROOT, path)
+    content_type, _ = mimetypes.guess_type(fullpath)
+    encoding = choose_encoding(request, [
+        name for name, suffix in ENCODINGS
+        if os.path.isfile(fullpath + suffix)
+    ])
+    if encoding:
+        fullpath += dict(ENCODINGS)[encoding]
+    response = FileResponse(
+        open(fullpath, 'rb'),
+        content_type=content_type or 'application/octet-stream'
+    )
+    if encoding:
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ('Accept-Encoding',))
+    hashed = HASHED_NAME.search(path)
+    response['Cache-Control'] = IMMUTABLE if hashed else SHORT
+    return response
+
+
+def parse_range(header, size):
+    """Один диапазон 'bytes=a-b' -> (начало, конец) включительно.
+
+    None - заголовка нет или он не разобран (отдаём файл целиком),
+    False - диапазон вне файла.
+    """
+    match = RANGE.match(header or '')
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if start == '':
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def read_range(fullpath, start, length):
+    with open(fullpath, 'rb') as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def serve_media(request, path):
+    """Отдаёт загруженные файлы и миниатюры из MEDIA_ROOT.
+
+    Поддерживает ETag/If-None-Match и запросы диапазонов. При
+    MEDIA_SENDFILE передача файла поручается веб-серверу
+    (X-Sendfile для Apache, X-Accel-Redirect для nginx),
+    и Python отдаёт только заголовки.
+    """
+    fullpath = resolve(settings.MEDIA_ROOT, path)
+    stat = os.stat(fullpath)
+    etag = '"{:x}-{:x}"'.format(int(stat.st_mtime), stat.st_size)
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    content_type, _ = mimetypes.guess_type(fullpath)
+    content_type = content_type or 'application/octet-stream'
+    if not_modified is not None:
+        response = not_modified
+    elif settings.MEDIA_SENDFILE == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = fullpath
+    elif settings.MEDIA_SENDFILE == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.MEDIA_SENDFILE_PREFIX + path
+    else:
+        response = media_body(request, fullpath, stat.st_size, content_type)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = 'public, max-age={}'.format(
+        settings.MEDIA_MAX_AGE
+    )
+    return response
+
+
+def media_body(request, fullpath, size, content_type):
+    byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if byte_range is None:
+        response = FileResponse(
+            open(fullpath, 'rb'), content_type=content_type
+        )
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            read_range(fullpath, start, length),
+            status=206,
+            content_type=content_type
+        )
+        response['Content-Length'] = str(length)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
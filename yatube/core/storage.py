@@ -0,0 +1,55 @@
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_EXTENSIONS = (
+    '.css', '.js', '.svg', '.ico', '.txt', '.html', '.json', '.xml',
+)
+
+
+def compressors():
+    """Доступные алгоритмы: расширение файла -> функция сжатия."""
+    found = {'.gz': lambda data: gzip.compress(data, compresslevel=9)}
+    if brotli is not None:
+        found['.br'] = brotli.compress
+    return found
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Манифест с хэшами в именах + заранее сжатые копии файлов.
+
+    При collectstatic рядом с каждым текстовым файлом с хэшем в имени
+    кладутся .gz (и .br, если установлен пакет brotli), чтобы не
+    сжимать их на каждый запрос.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed = []
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed.append(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name in hashed:
+            if name.endswith(COMPRESS_EXTENSIONS):
+                self.compress(name)
+
+    def compress(self, name):
+        with self.open(name) as original:
+            data = original.read()
+        for suffix, compress in compressors().items():
+            packed = compress(data)
+            # Сжатая копия нужна, только если она заметно меньше
+            if len(packed) < len(data) * 0.9:
+                if self.exists(name + suffix):
+                    self.delete(name + suffix)
+                self.save(name + suffix, ContentFile(packed))
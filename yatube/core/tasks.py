@@ -0,0 +1,106 @@
+"""Очередь фоновых задач на таблице в базе данных.
+
+Функция регистрируется декоратором ``@task``, ставится в очередь через
+``enqueue`` и выполняется командой ``python manage.py run_tasks``.
+"""
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+def task(func):
+    """Регистрирует функцию как фоновую задачу."""
+    func.task_name = f'{func.__module__}.{func.__name__}'
+    registry[func.task_name] = func
+    return func
+
+
+def enqueue(func, delay=0, **kwargs):
+    """Ставит задачу в очередь. Аргументы должны сериализоваться в JSON.
+
+    При TASKS_EAGER задача выполняется сразу же (удобно для тестов).
+    """
+    if settings.TASKS_EAGER:
+        func(**kwargs)
+        return None
+    return Task.objects.create(
+        name=func.task_name,
+        payload=json.dumps(kwargs),
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def claim(task_obj, now):
+    """Забирает задачу себе; False, если её уже взял другой обработчик.
+
+    Захват продлевает run_after, поэтому условие run_after <= now
+    не даёт второму обработчику взять ту же задачу или запустить
+    повтор раньше конца задержки.
+    """
+    lease = now + timedelta(seconds=settings.TASKS_LEASE)
+    return bool(
+        Task.objects.filter(
+            pk=task_obj.pk, status=task_obj.status, run_after__lte=now
+        ).update(
+            status=Task.RUNNING, attempts=F('attempts') + 1, run_after=lease
+        )
+    )
+
+
+def execute(task_obj):
+    task_obj.refresh_from_db()
+    try:
+        func = registry[task_obj.name]
+        func(**json.loads(task_obj.payload))
+    except Exception:
+        task_obj.last_error = traceback.format_exc()
+        if task_obj.attempts >= settings.TASKS_MAX_ATTEMPTS:
+            task_obj.status = Task.FAILED
+            logger.error('Задача %s не выполнена', task_obj)
+        else:
+            task_obj.status = Task.PENDING
+            # Экспоненциальная задержка перед повтором
+            task_obj.run_after = timezone.now() + timedelta(
+                seconds=settings.TASKS_RETRY_DELAY * 2 ** task_obj.attempts
+            )
+        task_obj.save(update_fields=['status', 'run_after', 'last_error'])
+        return False
+    task_obj.status = Task.DONE
+    task_obj.save(update_fields=['status'])
+    return True
+
+
+def run_pending(limit=100):
+    """Выполняет готовые к запуску задачи. Возвращает их количество.
+
+    Задачи в статусе "выполняется" с истёкшей арендой считаются
+    брошенными упавшим обработчиком и берутся заново.
+    """
+    now = timezone.now()
+    ready = Task.objects.filter(
+        Q(status=Task.PENDING) | Q(status=Task.RUNNING),
+        run_after__lte=now,
+    )[:limit]
+    done = 0
+    for task_obj in ready:
+        if claim(task_obj, now):
+            execute(task_obj)
+            done += 1
+    return done
+
+
+def purge_done(days=7):
+    """Удаляет выполненные задачи старше указанного числа дней."""
+    border = timezone.now() - timedelta(days=days)
+    return Task.objects.filter(status=Task.DONE, created__lt=border).delete()
@@ -1,6 +1,39 @@
+import gzip
+import os
+import shutil
+import tempfile
 from http import HTTPStatus
+from io import StringIO
 
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import Http404, StreamingHttpResponse
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .middleware import CompressionMiddleware, compressed_cache
+from .models import Task
+from .paginator import CachedCountPaginator
+from .ratelimit import throttled_count
+from .serving import choose_encoding, serve_media, serve_static
+from .tasks import claim, enqueue, run_pending, task
+
+User = get_user_model()
+
+calls = []
+
+
+@task
+def remember(value):
+    calls.append(value)
+
+
+@task
+def broken():
+    raise ValueError('сломано')
 
 
 class ViewTestClass(TestCase):
@@ -10,3 +43,273 @@ class ViewTestClass(TestCase):
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         # Проверьте, что используется шаблон core/404.html
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_and_run(self):
+        """Задача сохраняется в таблицу и выполняется обработчиком"""
+        enqueue(remember, value=1)
+        self.assertEqual(calls, [])
+        call_command('run_tasks', '--once', stdout=StringIO())
+        self.assertEqual(calls, [1])
+        self.assertEqual(Task.objects.get().status, Task.DONE)
+
+    @override_settings(TASKS_MAX_ATTEMPTS=2, TASKS_RETRY_DELAY=0)
+    def test_retry_then_fail(self):
+        """Упавшая задача повторяется и помечается ошибкой"""
+        enqueue(broken)
+        run_pending()
+        task_obj = Task.objects.get()
+        self.assertEqual(task_obj.status, Task.PENDING)
+        self.assertIn('сломано', task_obj.last_error)
+        run_pending()
+        task_obj.refresh_from_db()
+        self.assertEqual(task_obj.status, Task.FAILED)
+        self.assertEqual(task_obj.attempts, 2)
+
+    def test_claimed_once(self):
+        """Брошенную задачу забирает только один из обработчиков"""
+        enqueue(remember, value=3)
+        Task.objects.update(status=Task.RUNNING)
+        now = timezone.now()
+        first, second = Task.objects.get(), Task.objects.get()
+        self.assertTrue(claim(first, now))
+        self.assertFalse(claim(second, now))
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager(self):
+        """В режиме TASKS_EAGER задача выполняется сразу"""
+        enqueue(remember, value=2)
+        self.assertEqual(calls, [2])
+        self.assertFalse(Task.objects.exists())
+
+
+@override_settings(RATELIMITS={'follow': {'user': '2/m', 'ip': '100/m'}})
+class RateLimitTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.author = User.objects.create_user(username='author')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_throttled_after_limit(self):
+        """После исчерпания лимита запросы отклоняются с кодом 429"""
+        url = reverse('posts:profile_follow', args=[self.author.username])
+        for _ in range(2):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertTemplateUsed(response, 'core/429.html')
+        self.assertEqual(throttled_count('follow'), 1)
+
+    @override_settings(RATELIMIT_ENABLED=False)
+    def test_disabled(self):
+        """Ограничение можно выключить настройкой"""
+        url = reverse('posts:profile_follow', args=[self.author.username])
+        for _ in range(3):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+
+class StaticPipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.mkdtemp()
+        cls.settings_override = override_settings(
+            STATIC_ROOT=cls.static_root,
+            STATICFILES_STORAGE=(
+                'core.storage.CompressedManifestStaticFilesStorage'
+            ),
+        )
+        cls.settings_override.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        shutil.rmtree(cls.static_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_hashed_and_compressed(self):
+        """collectstatic кладёт файлы с хэшем и их сжатые копии"""
+        hashed = staticfiles_storage.stored_name('css/bootstrap.min.css')
+        self.assertNotEqual(hashed, 'css/bootstrap.min.css')
+        self.assertTrue(
+            os.path.isfile(os.path.join(self.static_root, hashed + '.gz'))
+        )
+
+    def test_serve_immutable_gzip(self):
+        """Файл с хэшем отдаётся сжатым и с вечным кэшированием"""
+        hashed = staticfiles_storage.stored_name('css/bootstrap.min.css')
+        request = RequestFactory().get(
+            '/static/' + hashed, HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        response = serve_static(request, hashed)
+        response.close()
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Content-Type'], 'text/css')
+
+    def test_traversal_not_found(self):
+        """Путь за пределы STATIC_ROOT даёт 404"""
+        request = RequestFactory().get('/static/../settings.py')
+        with self.assertRaises(Http404):
+            serve_static(request, '../settings.py')
+
+    def test_encoding_refused(self):
+        """Кодировка с q=0 не выбирается, даже если есть в заголовке"""
+        hashed = staticfiles_storage.stored_name('css/bootstrap.min.css')
+        request = RequestFactory().get(
+            '/static/' + hashed, HTTP_ACCEPT_ENCODING='gzip;q=0, identity'
+        )
+        response = serve_static(request, hashed)
+        response.close()
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_choose_encoding(self):
+        """Выбор по q-значениям, '*' и порядку предпочтения"""
+        cases = (
+            ('gzip, br', 'br'),
+            ('br;q=0.5, gzip', 'gzip'),
+            ('br;q=0, *', 'gzip'),
+            ('xgzip', None),
+            ('*;q=0', None),
+        )
+        for header, expected in cases:
+            with self.subTest(header=header):
+                request = RequestFactory().get(
+                    '/', HTTP_ACCEPT_ENCODING=header
+                )
+                self.assertEqual(
+                    choose_encoding(request, ['br', 'gzip']), expected
+                )
+
+
+class MediaServingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        with open(os.path.join(cls.media_root, 'file.txt'), 'wb') as file:
+            file.write(b'0123456789')
+        cls.factory = RequestFactory()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def get(self, **headers):
+        with self.settings(MEDIA_ROOT=self.media_root):
+            return serve_media(
+                self.factory.get('/media/file.txt', **headers), 'file.txt'
+            )
+
+    def test_etag_not_modified(self):
+        """Повторный запрос с ETag получает 304"""
+        etag = self.get()['ETag']
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_range(self):
+        """Запрос диапазона отдаёт только нужные байты"""
+        response = self.get(HTTP_RANGE='bytes=2-5')
+        self.assertEqual(response.status_code, HTTPStatus.PARTIAL_CONTENT)
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+        response = self.get(HTTP_RANGE='bytes=-3')
+        self.assertEqual(b''.join(response.streaming_content), b'789')
+        response = self.get(HTTP_RANGE='bytes=20-')
+        self.assertEqual(
+            response.status_code,
+            HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+
+    def test_sendfile(self):
+        """Передача файла поручается веб-серверу"""
+        with self.settings(MEDIA_SENDFILE='x-accel-redirect'):
+            response = self.get()
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected-media/file.txt'
+        )
+        self.assertEqual(response.content, b'')
+
+    def test_outside_root(self):
+        """Файлы вне MEDIA_ROOT не отдаются"""
+        with self.settings(MEDIA_ROOT=self.media_root):
+            with self.assertRaises(Http404):
+                serve_media(self.factory.get('/'), '../secret')
+
+
+class CompressionMiddlewareTests(TestCase):
+    def test_gzip_page(self):
+        """Страница сжимается, если клиент принимает gzip"""
+        response = self.client.get('/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn('<html', gzip.decompress(response.content).decode())
+
+    def test_no_accept_encoding(self):
+        """Без Accept-Encoding ответ не сжимается"""
+        response = self.client.get('/')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_gzip_refused(self):
+        """gzip;q=0 - отказ от сжатия, а не согласие"""
+        response = self.client.get('/', HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_csrf_page_not_compressed(self):
+        """Страница с CSRF-токеном не сжимается (BREACH)"""
+        response = self.client.get(
+            reverse('login'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_personal_page_not_cached(self):
+        """Страница пользователя сжимается, но не попадает в LRU"""
+        self.client.force_login(User.objects.create_user(username='zip'))
+        compressed_cache.items.clear()
+        response = self.client.get('/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(len(compressed_cache.items), 0)
+
+    def test_streaming(self):
+        """Потоковый ответ сжимается по частям"""
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        response = CompressionMiddleware().process_response(
+            request, StreamingHttpResponse([b'a' * 500, b'b' * 500])
+        )
+        body = gzip.decompress(b''.join(response.streaming_content))
+        self.assertEqual(body, b'a' * 500 + b'b' * 500)
+
+
+class CachedCountPaginatorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_count_cached(self):
+        """Число записей одного запроса считается один раз"""
+        Task.objects.create(name='first', run_after=timezone.now())
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                CachedCountPaginator(Task.objects.all(), 10).count, 1
+            )
+        Task.objects.create(name='second', run_after=timezone.now())
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                CachedCountPaginator(Task.objects.all(), 10).count, 1
+            )
+        self.assertEqual(
+            CachedCountPaginator(Task.objects.filter(name='second'), 10).count,
+            1
+        )
@@ -1,27 +1,53 @@
 from django.contrib import admin
 
+from core.admin import BackgroundDeleteMixin
+from core.paginator import CachedCountPaginator
+
+from . import deletion
 from .models import Follow, Group, Post, Comment
 
 
-class PostAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'text', 'pub_date', 'author', 'group',)
-    list_editable = ('group',)
+class LargeTableAdmin(admin.ModelAdmin):
+    """Список без точного COUNT(*) на каждый запрос."""
+    paginator = CachedCountPaginator
+    # Иначе на странице с фильтрами считается ещё и вся таблица
+    show_full_result_count = False
+
+
+class PostAdmin(LargeTableAdmin):
+    list_display = ('pk', 'text', 'pub_date', 'author', 'group', 'views',)
+    list_select_related = ('author', 'group')
+    # Выпадающий список групп в каждой строке стоил запроса на строку,
+    # поэтому группа меняется на странице поста через автодополнение
+    autocomplete_fields = ('author', 'group')
     search_fields = ('text',)
+    # Фильтр по дате не делает запросов, в отличие от фильтра по автору
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
     empty_value_display = '-пусто-'
 
 
-class GroupAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'title', 'slug', 'description')
+class GroupAdmin(BackgroundDeleteMixin, admin.ModelAdmin):
+    list_display = ('pk', 'title', 'slug', 'description', 'deletion_status')
+    search_fields = ('title', 'slug')
+
+    def schedule_deletion(self, obj):
+        # Посты группы не удаляются, а остаются без группы
+        deletion.schedule_group_deletion(obj)
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     list_display = ('author', 'post', 'text', 'created')
-    list_filter = ('author', 'created')
+    list_select_related = ('author', 'post')
+    autocomplete_fields = ('author',)
+    raw_id_fields = ('post',)
+    date_hierarchy = 'created'
 
 
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(LargeTableAdmin):
     list_display = ('user', 'author')
+    list_select_related = ('user', 'author')
+    autocomplete_fields = ('user', 'author')
 
 
 admin.site.register(Post, PostAdmin)
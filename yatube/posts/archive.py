@@ -0,0 +1,89 @@
+"""Архив старых постов.
+
+Посты старше ARCHIVE_AFTER_DAYS вместе с комментариями переносятся
+в архивные таблицы небольшими пачками: каждая пачка - отдельная
+короткая транзакция, так что запись на сайт не блокируется надолго.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from yatube.settings import ARCHIVE_AFTER_DAYS, ARCHIVE_CHUNK_SIZE
+
+from .models import ArchivedComment, ArchivedPost, Comment, Post
+
+POST_FIELDS = (
+    'id', 'text', 'pub_date', 'updated', 'author_id', 'group_id', 'image',
+    'views',
+)
+COMMENT_FIELDS = ('id', 'post_id', 'author_id', 'text', 'created')
+
+
+def archive_chunk(border, chunk_size=ARCHIVE_CHUNK_SIZE):
+    """Переносит в архив одну пачку постов старше border.
+
+    Возвращает количество перенесённых постов.
+    """
+    with transaction.atomic():
+        posts = list(
+            Post.objects.filter(pub_date__lt=border).order_by('pk').values(
+                *POST_FIELDS
+            )[:chunk_size]
+        )
+        if not posts:
+            return 0
+        ids = [post['id'] for post in posts]
+        comments = Comment.objects.filter(post_id__in=ids).values(
+            *COMMENT_FIELDS
+        )
+        ArchivedPost.objects.bulk_create(
+            ArchivedPost(**post) for post in posts
+        )
+        ArchivedComment.objects.bulk_create(
+            ArchivedComment(**comment) for comment in comments
+        )
+        # Комментарии уже скопированы, сигналов у них нет -
+        # удаляем одним запросом без загрузки объектов
+        moved = Comment.objects.filter(post_id__in=ids)
+        moved._raw_delete(moved.db)
+        Post.objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def archive_posts(days=ARCHIVE_AFTER_DAYS, chunk_size=ARCHIVE_CHUNK_SIZE):
+    """Переносит в архив все посты старше days дней.
+
+    Возвращает количество перенесённых постов.
+    """
+    border = timezone.now() - timedelta(days=days)
+    total = 0
+    while True:
+        moved = archive_chunk(border, chunk_size)
+        if not moved:
+            return total
+        total += moved
+
+
+def delete_chunked(queryset, chunk_size=ARCHIVE_CHUNK_SIZE):
+    """Удаляет записи пачками по первичному ключу."""
+    total = 0
+    while True:
+        ids = list(queryset.values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return total
+        with transaction.atomic():
+            total += queryset.model.objects.filter(pk__in=ids).delete()[0]
+
+
+def purge_user_archive(user_id, chunk_size=ARCHIVE_CHUNK_SIZE):
+    """Удаляет архивные посты и комментарии удалённого пользователя."""
+    deleted = delete_chunked(
+        ArchivedComment.objects.filter(author_id=user_id), chunk_size
+    )
+    posts = ArchivedPost.objects.filter(author_id=user_id)
+    deleted += delete_chunked(
+        ArchivedComment.objects.filter(post__in=posts), chunk_size
+    )
+    deleted += delete_chunked(posts, chunk_size)
+    return deleted
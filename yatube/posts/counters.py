@@ -0,0 +1,130 @@
+"""Счётчики постов для пагинатора.
+
+Вместо COUNT(*) по большой ленте при каждом просмотре страницы число
+постов читается из таблицы счётчиков по первичному ключу. Счётчик
+заводится точным подсчётом при первом обращении и дальше меняется
+сигналами. Гонка между подсчётом и сигналом может сбить счётчик,
+поэтому раз в POST_COUNTER_RECOUNT секунд он считается заново
+(или сразу - командой recount_posts). Ленты меньше
+POST_COUNTER_EXACT_BELOW постов всегда считаются точно: это дёшево.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Post, PostCounter
+
+INDEX_KEY = 'index'
+
+
+def group_key(group_id):
+    return f'group:{group_id}'
+
+
+def author_key(author_id):
+    return f'author:{author_id}'
+
+
+def stale_border():
+    return timezone.now() - timedelta(seconds=settings.POST_COUNTER_RECOUNT)
+
+
+def store(key, value):
+    """Записывает точное значение счётчика."""
+    now = timezone.now()
+    if not PostCounter.objects.filter(key=key).update(
+        value=value, counted=now
+    ):
+        PostCounter.objects.bulk_create(
+            [PostCounter(key=key, value=value, counted=now)],
+            ignore_conflicts=True
+        )
+
+
+def get_count(key, queryset):
+    row = PostCounter.objects.filter(key=key).values_list(
+        'value', 'counted'
+    ).first()
+    if row is not None:
+        value, counted = row
+        fresh = counted >= stale_border()
+        if fresh and value >= settings.POST_COUNTER_EXACT_BELOW:
+            return value
+    exact = queryset.count()
+    if row is None or not fresh or exact != value:
+        store(key, exact)
+    return exact
+
+
+def index_count():
+    return get_count(INDEX_KEY, Post.objects.all())
+
+
+def group_count(group_id):
+    return get_count(group_key(group_id), Post.objects.filter(
+        group_id=group_id
+    ))
+
+
+def author_count(author_id):
+    return get_count(author_key(author_id), Post.objects.filter(
+        author_id=author_id
+    ))
+
+
+def authors_count(author_ids):
+    """Число постов нескольких авторов (лента подписок).
+
+    Сумма счётчиков авторов; недостающие и устаревшие счётчики
+    пересчитываются одним сгруппированным запросом.
+    """
+    keys = {author_key(author_id): author_id for author_id in author_ids}
+    if not keys:
+        return 0
+    known = dict(
+        PostCounter.objects.filter(
+            key__in=keys, counted__gte=stale_border()
+        ).values_list('key', 'value')
+    )
+    missing = [keys[key] for key in keys if key not in known]
+    if missing:
+        counts = dict.fromkeys(missing, 0)
+        counts.update(
+            Post.objects.filter(author_id__in=missing).order_by().values(
+                'author'
+            ).annotate(posts=Count('id')).values_list('author', 'posts')
+        )
+        for author_id, value in counts.items():
+            store(author_key(author_id), value)
+            known[author_key(author_id)] = value
+    total = sum(known.values())
+    if total < settings.POST_COUNTER_EXACT_BELOW:
+        return Post.objects.filter(author_id__in=author_ids).count()
+    return total
+
+
+def post_keys(post, group_id):
+    keys = [INDEX_KEY, author_key(post.author_id)]
+    if group_id:
+        keys.append(group_key(group_id))
+    return keys
+
+
+def add(keys, delta):
+    """Меняет существующие счётчики; отсутствующие посчитаются позже."""
+    PostCounter.objects.filter(key__in=keys).update(value=F('value') + delta)
+
+
+def forget(keys):
+    """Сбрасывает счётчики, чтобы их пересчитали точно.
+
+    Нужно после удалений в обход сигналов.
+    """
+    PostCounter.objects.filter(key__in=keys).delete()
+
+
+def recount():
+    """Сбрасывает все счётчики; они пересчитаются при обращении."""
+    return PostCounter.objects.all().delete()[0]
@@ -0,0 +1,207 @@
+"""Удаление пользователей и групп пачками в фоне.
+
+Обычный delete() пользователя загружает в память все его посты,
+комментарии и подписки ради сигналов и удаляет их одной транзакцией,
+блокируя SQLite. Здесь зависимые записи удаляются короткими пачками;
+там, где у моделей нет сигналов удаления, - сырым DELETE без загрузки
+объектов. Сам пользователь или группа удаляются обычным delete(),
+когда связанных записей уже не осталось.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import DeletionProgress
+from core.tasks import enqueue, task
+from yatube.settings import DELETION_CHUNK_SIZE, DELETION_PROGRESS_TIMEOUT
+
+from . import counters
+from .directory import DIRECTORY_KEY
+from .follow_graph import following_key
+from .models import (ArchivedPost, Comment, DigestState, Follow,
+                     FollowRecommendation, Group, GroupScore, Post,
+                     PostScore, User)
+
+
+def progress_rows(model, pk):
+    return DeletionProgress.objects.filter(
+        model=model._meta.label_lower, object_id=pk
+    )
+
+
+def deletion_progress(model, pk):
+    """Ход удаления: {'deleted': записей, 'done': bool} или None."""
+    return progress_rows(model, pk).values('deleted', 'done').first()
+
+
+class Progress:
+    """Ход удаления в базе; создаётся заново с нулём удалённых."""
+
+    def __init__(self, model, pk):
+        self.model = model
+        self.pk = pk
+        self.deleted = 0
+        self.save(done=False)
+
+    def add(self, count):
+        self.deleted += count
+        self.save(done=False)
+
+    def save(self, done):
+        values = {
+            'deleted': self.deleted, 'done': done, 'updated': timezone.now()
+        }
+        if not progress_rows(self.model, self.pk).update(**values):
+            DeletionProgress.objects.bulk_create(
+                [DeletionProgress(
+                    model=self.model._meta.label_lower, object_id=self.pk,
+                    **values
+                )],
+                ignore_conflicts=True
+            )
+
+
+def forget_finished():
+    """Удаляет ход давно законченных удалений."""
+    border = timezone.now() - timedelta(seconds=DELETION_PROGRESS_TIMEOUT)
+    DeletionProgress.objects.filter(done=True, updated__lt=border).delete()
+
+
+def drop_cached(keys):
+    """Сбрасывает записи кэша, которые сигналы удаления не сбросили.
+
+    Локальный кэш веб-процессов из обработчика задач недостижим, и
+    сброс имеет смысл только для общего кэша или задач, выполненных
+    в самом запросе. Иначе записи живут до своего короткого таймаута
+    (FOLLOW_GRAPH_TIMEOUT, GROUPS_DIRECTORY_TIMEOUT).
+    """
+    if settings.SHARED_CACHE or settings.TASKS_EAGER:
+        cache.delete_many(keys)
+
+
+def chunks(queryset, chunk_size, *fields):
+    """Пачки значений полей (по умолчанию pk) до исчерпания выборки.
+
+    Выборка должна сужаться по мере обработки пачек.
+    """
+    fields = fields or ('pk',)
+    while True:
+        rows = list(
+            queryset.order_by('pk').values_list(*fields)[:chunk_size]
+        )
+        if not rows:
+            return
+        yield rows
+
+
+def raw_delete_chunked(queryset, progress, chunk_size=DELETION_CHUNK_SIZE):
+    """Удаляет записи пачками одним DELETE на пачку, без сигналов."""
+    model = queryset.model
+    for rows in chunks(queryset, chunk_size):
+        batch = model.objects.filter(pk__in=[pk for pk, in rows])
+        progress.add(batch._raw_delete(batch.db))
+
+
+def delete_follows(queryset, progress, chunk_size=DELETION_CHUNK_SIZE):
+    """Подписки удаляем без сигналов, а кэш подписок сбрасываем сами."""
+    for rows in chunks(queryset, chunk_size, 'pk', 'user_id'):
+        batch = Follow.objects.filter(pk__in=[pk for pk, _ in rows])
+        progress.add(batch._raw_delete(batch.db))
+        drop_cached(
+            [following_key(user_id) for user_id in {row[1] for row in rows}]
+        )
+
+
+def delete_posts(queryset, progress, chunk_size=DELETION_CHUNK_SIZE):
+    """Посты пачками вместе с комментариями и рейтингами."""
+    keys = {counters.INDEX_KEY}
+    for rows in chunks(queryset, chunk_size, 'pk', 'author_id', 'group_id'):
+        ids = [pk for pk, _, _ in rows]
+        for _, author_id, group_id in rows:
+            keys.add(counters.author_key(author_id))
+            if group_id:
+                keys.add(counters.group_key(group_id))
+        raw_delete_chunked(
+            Comment.objects.filter(post_id__in=ids), progress, chunk_size
+        )
+        with transaction.atomic():
+            scores = PostScore.objects.filter(post_id__in=ids)
+            scores._raw_delete(scores.db)
+            batch = Post.objects.filter(pk__in=ids)
+            progress.add(batch._raw_delete(batch.db))
+    # Сигналы удаления не сработали - счётчики пересчитаются заново
+    counters.forget(keys)
+    drop_cached([DIRECTORY_KEY])
+
+
+@task
+def delete_user(user_id, chunk_size=DELETION_CHUNK_SIZE):
+    """Удаляет пользователя и всё, что от него зависит, пачками."""
+    user = User.objects.filter(pk=user_id).first()
+    if user is None:
+        return
+    progress = Progress(User, user_id)
+    delete_follows(Follow.objects.filter(user_id=user_id), progress,
+                   chunk_size)
+    delete_follows(Follow.objects.filter(author_id=user_id), progress,
+                   chunk_size)
+    raw_delete_chunked(
+        FollowRecommendation.objects.filter(user_id=user_id), progress,
+        chunk_size
+    )
+    raw_delete_chunked(
+        FollowRecommendation.objects.filter(author_id=user_id), progress,
+        chunk_size
+    )
+    raw_delete_chunked(
+        Comment.objects.filter(author_id=user_id), progress, chunk_size
+    )
+    delete_posts(Post.objects.filter(author_id=user_id), progress,
+                 chunk_size)
+    raw_delete_chunked(
+        DigestState.objects.filter(user_id=user_id), progress, chunk_size
+    )
+    # Остальное (сессии, права, архив) немногочисленно или чистится
+    # своими сигналами
+    progress.add(user.delete()[0])
+    progress.save(done=True)
+
+
+@task
+def delete_group(group_id, chunk_size=DELETION_CHUNK_SIZE):
+    """Удаляет группу, отвязывая её посты пачками."""
+    group = Group.objects.filter(pk=group_id).first()
+    if group is None:
+        return
+    progress = Progress(Group, group_id)
+    for model in (Post, ArchivedPost):
+        for rows in chunks(model.objects.filter(group_id=group_id),
+                           chunk_size):
+            progress.add(
+                model.objects.filter(pk__in=[pk for pk, in rows]).update(
+                    group=None
+                )
+            )
+    raw_delete_chunked(
+        GroupScore.objects.filter(group_id=group_id), progress, chunk_size
+    )
+    progress.add(group.delete()[0])
+    progress.save(done=True)
+
+
+def schedule_user_deletion(user):
+    """Отключает пользователя сразу и ставит удаление в очередь."""
+    user.is_active = False
+    user.save(update_fields=['is_active'])
+    forget_finished()
+    Progress(User, user.pk)
+    enqueue(delete_user, user_id=user.pk)
+
+
+def schedule_group_deletion(group):
+    forget_finished()
+    Progress(Group, group.pk)
+    enqueue(delete_group, group_id=group.pk)
@@ -0,0 +1,56 @@
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from yatube.settings import GROUPS_DIRECTORY_TIMEOUT, GROUPS_TOP_AUTHORS
+
+from .models import Group, Post
+
+DIRECTORY_KEY = 'groups:directory'
+
+
+def top_authors():
+    """Самые активные авторы каждой группы одним агрегирующим запросом."""
+    rows = Post.objects.filter(group__isnull=False).values(
+        'group', 'author__username'
+    ).annotate(posts=Count('id')).order_by('group', '-posts')
+    authors = defaultdict(list)
+    for row in rows:
+        group_authors = authors[row['group']]
+        if len(group_authors) < GROUPS_TOP_AUTHORS:
+            group_authors.append(row['author__username'])
+    return authors
+
+
+def build_directory():
+    """Каталог групп: число постов, последняя активность и авторы."""
+    groups = Group.objects.annotate(
+        posts_count=Count('group_posts'),
+        last_post=Max('group_posts__pub_date'),
+    ).order_by('title')
+    authors = top_authors()
+    return [
+        {
+            'title': group.title,
+            'slug': group.slug,
+            'description': group.description,
+            'posts_count': group.posts_count,
+            'last_post': group.last_post,
+            'authors': authors.get(group.pk, []),
+        }
+        for group in groups
+    ]
+
+
+def group_directory():
+    """Каталог групп из кэша; сбрасывается сигналами при изменениях."""
+    directory = cache.get(DIRECTORY_KEY)
+    if directory is None:
+        directory = build_directory()
+        cache.set(DIRECTORY_KEY, directory, GROUPS_DIRECTORY_TIMEOUT)
+    return directory
+
+
+def invalidate_directory():
+    cache.delete(DIRECTORY_KEY)
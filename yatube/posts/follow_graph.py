@@ -0,0 +1,43 @@
+from django.core.cache import cache
+
+from yatube.settings import FOLLOW_GRAPH_TIMEOUT
+
+from .models import Follow
+
+
+def following_key(user_id):
+    return 'follow:following:{}'.format(user_id)
+
+
+def load_following(user_id):
+    """Читает подписки пользователя из базы и обновляет кэш."""
+    ids = frozenset(
+        Follow.objects.filter(user_id=user_id).values_list(
+            'author_id', flat=True
+        )
+    )
+    cache.set(following_key(user_id), ids, FOLLOW_GRAPH_TIMEOUT)
+    return ids
+
+
+def following_ids(user_id):
+    """Множество id авторов, на которых подписан пользователь."""
+    ids = cache.get(following_key(user_id))
+    if ids is None:
+        ids = load_following(user_id)
+    return ids
+
+
+def is_following(user, author):
+    """Подписан ли пользователь на автора."""
+    if not user.is_authenticated:
+        return False
+    return author.pk in following_ids(user.pk)
+
+
+def following_map(user, author_ids):
+    """Состояние подписки для пачки авторов: {id автора: bool}."""
+    if not user.is_authenticated:
+        return dict.fromkeys(author_ids, False)
+    ids = following_ids(user.pk)
+    return {author_id: author_id in ids for author_id in author_ids}
@@ -0,0 +1,86 @@
+from django.core.paginator import Paginator
+
+from yatube.settings import LATEST_COMMENTS_COUNT, RECORDS_ONE_PAGE
+
+from .counters import author_count
+from .follow_graph import is_following
+from .lookups import get_user_or_404
+from .models import Comment, User
+from .rendering import prefetch_rendered
+
+
+def paginator(request, posts, count=None):
+    """Страница постов; count - заранее известное число постов,
+    чтобы не делать лишний COUNT(*)."""
+    paginator = Paginator(posts, RECORDS_ONE_PAGE)
+    if count is not None:
+        paginator.count = count
+    # Из URL извлекаем номер запрошенной страницы - это значение параметра page
+    page_number = request.GET.get('page')
+    # Получаем набор записей для страницы с запрошенным номером
+    # Страница ленивая: посты, их тексты и комментарии загружает тег
+    # prepare_posts в шаблоне, так что закэшированный фрагмент обходится
+    # без этих запросов
+    return paginator.get_page(page_number)
+
+
+LATEST_COMMENTS_SQL = '''
+    SELECT * FROM (
+        SELECT comment.*, author.username AS author_username,
+            ROW_NUMBER() OVER (
+                PARTITION BY comment.post_id
+                ORDER BY comment.created DESC, comment.id DESC
+            ) AS position,
+            COUNT(*) OVER (PARTITION BY comment.post_id) AS comments_count
+        FROM {comment} AS comment
+        JOIN {user} AS author ON author.id = comment.author_id
+        WHERE comment.post_id IN ({posts})
+    ) AS ranked
+    WHERE position <= %s
+    ORDER BY post_id, position
+'''
+
+
+def prefetch_comments(posts, limit=LATEST_COMMENTS_COUNT):
+    """Число комментариев и последние комментарии для списка постов.
+
+    Один оконный запрос на всю страницу: нумерация комментариев внутри
+    поста отбирает последние, а общее число считается по тому же окну.
+    """
+    posts = list(posts)
+    by_pk = {post.pk: post for post in posts}
+    for post in posts:
+        post.comments_count = 0
+        post.latest_comments = []
+    if not by_pk:
+        return posts
+    sql = LATEST_COMMENTS_SQL.format(
+        comment=Comment._meta.db_table,
+        user=User._meta.db_table,
+        posts=', '.join(['%s'] * len(by_pk)),
+    )
+    comments = list(Comment.objects.raw(sql, [*by_pk, limit]))
+    for comment in comments:
+        post = by_pk[comment.post_id]
+        post.comments_count = comment.comments_count
+        post.latest_comments.append(comment)
+    prefetch_rendered(comments)
+    return posts
+
+
+def load_profile(request, username):
+    """Данные страницы профиля за фиксированное число запросов.
+
+    Автор берётся из кэша поиска по имени, число его постов - из
+    счётчика, страница постов с группами и комментарии к ней -
+    ещё два запроса; подписка берётся из кэша графа подписок.
+    """
+    author = get_user_or_404(username)
+    posts_count = author_count(author.pk)
+    posts = author.posts.select_related('author', 'group')
+    return {
+        'author': author,
+        'posts_count': posts_count,
+        'page_obj': paginator(request, posts, posts_count),
+        'following': is_following(request.user, author),
+    }
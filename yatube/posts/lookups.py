@@ -0,0 +1,134 @@
+"""Кэш поиска групп по слагу и пользователей по имени.
+
+Первый уровень - небольшой LRU в памяти процесса с коротким временем
+жизни, второй - общий кэш. Сигналы сбрасывают запись при переименовании
+или удалении; в других процессах локальная копия живёт не дольше
+LOOKUP_LOCAL_TIMEOUT секунд.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.http import Http404
+
+from yatube.settings import (LOOKUP_CACHE_SIZE, LOOKUP_CACHE_TIMEOUT,
+                             LOOKUP_LOCAL_TIMEOUT)
+
+from .models import Group, User
+
+
+def concrete(model, names):
+    """Поля в порядке модели - так их ждёт Model.from_db."""
+    return tuple(
+        field.attname for field in model._meta.concrete_fields
+        if field.attname in names
+    )
+
+
+# модель -> (поле поиска, загружаемые поля)
+LOOKUPS = {
+    Group: ('slug', concrete(Group, ('id', 'title', 'slug', 'description'))),
+    User: (
+        'username',
+        concrete(User, ('id', 'username', 'first_name', 'last_name')),
+    ),
+}
+
+
+class LocalCache:
+    """LRU в памяти процесса с ограниченным временем жизни записей."""
+
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.items.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self.items[key]
+                return None
+            self.items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.items[key] = (time.monotonic() + self.timeout, value)
+            self.items.move_to_end(key)
+            if len(self.items) > self.size:
+                self.items.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.items.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+
+local = LocalCache(LOOKUP_CACHE_SIZE, LOOKUP_LOCAL_TIMEOUT)
+
+
+def lookup_key(model, value):
+    # Слаг или имя может содержать пробелы, кириллицу и быть длинным,
+    # а ключ Memcached - нет
+    digest = hashlib.md5(value.encode()).hexdigest()
+    return 'lookup:{}:{}'.format(model._meta.label_lower, digest)
+
+
+def forget(model, value):
+    key = lookup_key(model, value)
+    local.delete(key)
+    cache.delete(key)
+
+
+def get_or_404(model, value):
+    """Объект по слагу или имени с подгрузкой только нужных полей.
+
+    Остальные поля отложены и подгрузятся из базы при обращении.
+    """
+    field, names = LOOKUPS[model]
+    key = lookup_key(model, value)
+    values = local.get(key)
+    if values is None:
+        values = cache.get(key)
+        if values is None:
+            values = model.objects.filter(**{field: value}).values_list(
+                *names
+            ).first()
+            if values is None:
+                raise Http404(
+                    f'{model._meta.object_name} {value} не найден'
+                )
+            cache.set(key, values, LOOKUP_CACHE_TIMEOUT)
+        local.set(key, values)
+    return model.from_db('default', names, values)
+
+
+def exists_or_404(obj, value):
+    """Проверяет, что объект из кэша ещё есть в базе.
+
+    Нужно перед записью внешнего ключа на него: запись кэша могла
+    пережить удаление, а ключ проверяется только при фиксации.
+    """
+    model = type(obj)
+    if not model.objects.filter(pk=obj.pk).exists():
+        forget(model, value)
+        raise Http404(f'{model._meta.object_name} {value} не найден')
+    return obj
+
+
+def get_group_or_404(slug):
+    return get_or_404(Group, slug)
+
+
+def get_user_or_404(username):
+    return get_or_404(User, username)
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts.archive import archive_posts
+from yatube.settings import ARCHIVE_AFTER_DAYS, ARCHIVE_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Переносит старые посты и их комментарии в архив'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=ARCHIVE_AFTER_DAYS,
+            help='Архивировать посты старше указанного числа дней'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=ARCHIVE_CHUNK_SIZE,
+            help='Сколько постов переносить в одной транзакции'
+        )
+
+    def handle(self, *args, **options):
+        moved = archive_posts(options['days'], options['chunk_size'])
+        self.stdout.write(f'Перенесено в архив постов: {moved}')
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts.recommendations import build_recommendations
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации "на кого подписаться"'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько пользователей сохранять за одну транзакцию'
+        )
+
+    def handle(self, *args, **options):
+        processed = build_recommendations(batch_size=options['batch_size'])
+        self.stdout.write(f'Рекомендации обновлены для {processed} польз.')
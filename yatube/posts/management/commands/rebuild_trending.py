@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рейтинги раздела "Популярное" с нуля'
+
+    def handle(self, *args, **options):
+        rebuild()
+        self.stdout.write('Рейтинги пересчитаны')
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import recount
+
+
+class Command(BaseCommand):
+    help = 'Сбрасывает счётчики постов лент для точного пересчёта'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Сброшено счётчиков: {recount()}')
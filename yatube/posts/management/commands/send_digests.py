@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts.notifications import send_digests
+from yatube.settings import DIGEST_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Ставит в очередь рассылку дайджестов новых постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=DIGEST_BATCH_SIZE,
+            help='Сколько пользователей обрабатывать в одной задаче'
+        )
+
+    def handle(self, *args, **options):
+        batches = send_digests(options['batch_size'])
+        self.stdout.write(f'Поставлено в очередь пачек: {batches}')
@@ -0,0 +1,20 @@
+# Generated by Django 2.2.16 on 2026-10-19 19:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0030_auto_20261019_1954'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostCounter',
+            fields=[
+                ('key', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='лента')),
+                ('value', models.IntegerField(default=0, verbose_name='постов')),
+            ],
+        ),
+    ]
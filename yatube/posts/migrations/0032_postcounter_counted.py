@@ -0,0 +1,19 @@
+# Generated by Django 2.2.16 on 2026-10-19 20:05
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0031_postcounter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postcounter',
+            name='counted',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='точный подсчёт'),
+        ),
+    ]
@@ -1,11 +1,14 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 from django.db.models.constraints import UniqueConstraint
+from django.utils import timezone
+
+from core.models import UpdatedModel
 
 User = get_user_model()
 
 
-class Group(models.Model):
+class Group(UpdatedModel):
     title = models.CharField('Заглавие', max_length=200)
     slug = models.SlugField('Слаг', unique=True)
     description = models.TextField('описание')
@@ -14,7 +17,7 @@ class Group(models.Model):
         return self.title
 
 
-class Post(models.Model):
+class Post(UpdatedModel):
     text = models.TextField('Текст', help_text='Введите текст поста')
     pub_date = models.DateTimeField('дата публикации', auto_now_add=True)
     author = models.ForeignKey(
@@ -40,13 +43,44 @@ class Post(models.Model):
     )
     # Аргумент upload_to указывает директорию,
     # в которую будут загружаться пользовательские файлы.
+    views = models.PositiveIntegerField(
+        'просмотры',
+        default=0,
+        editable=False
+    )
 
     class Meta:
-        ordering = ['-pub_date']
+        # id - второй ключ: посты с одинаковым временем идут
+        # в стабильном порядке, а индексы совпадают с сортировкой
+        ordering = ['-pub_date', '-id']
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'], name='post_feed_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'], name='post_author_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'], name='post_group_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text
 
+    def save(self, *args, **kwargs):
+        # Просмотры пишет только счётчик через UPDATE views = views + n:
+        # сохранение поста с устаревшим значением затёрло бы прибавки
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name != 'views'
+                and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -65,7 +99,16 @@ class Comment(models.Model):
     created = models.DateTimeField('дата публикации', auto_now_add=True)
 
     class Meta:
-        ordering = ['-created']
+        ordering = ['-created', '-id']
+        indexes = [
+            models.Index(
+                fields=['post', '-created', '-id'], name='comment_post_idx'
+            ),
+            # Для списка и навигации по датам в админке
+            models.Index(
+                fields=['-created', '-id'], name='comment_created_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text
@@ -89,3 +132,159 @@ class Follow(models.Model):
         constraints = [
             UniqueConstraint(fields=['user', 'author'], name='unique_follow')
         ]
+
+
+class FollowRecommendation(models.Model):
+    """Заранее посчитанная рекомендация "на кого подписаться"."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommendations'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommended_to'
+    )
+    score = models.FloatField('вес')
+
+    class Meta:
+        ordering = ['-score']
+        constraints = [
+            UniqueConstraint(
+                fields=['user', 'author'], name='unique_recommendation'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-score'], name='recommendation_user_idx'
+            )
+        ]
+
+
+class PostScore(models.Model):
+    """Рейтинг поста для раздела "Популярное".
+
+    Хранится в логарифмической шкале с учётом времени событий,
+    поэтому не требует пересчёта по мере старения.
+    """
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='score'
+    )
+    score = models.FloatField('рейтинг', db_index=True)
+
+
+class GroupScore(models.Model):
+    """Рейтинг группы для раздела "Популярное"."""
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='score'
+    )
+    score = models.FloatField('рейтинг', db_index=True)
+
+
+class DigestState(models.Model):
+    """Когда пользователю последний раз отправляли дайджест."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='digest_state'
+    )
+    last_sent = models.DateTimeField('последняя отправка')
+
+
+class ArchivedPost(models.Model):
+    """Старый пост, перенесённый из основной таблицы.
+
+    id совпадает с id исходного поста, поэтому ссылки на него
+    продолжают работать. Связь с автором без ограничения в базе:
+    удаление пользователя не каскадирует в архив, его записи
+    удаляет фоновая задача пачками.
+    """
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Текст')
+    pub_date = models.DateTimeField('дата публикации')
+    updated = models.DateTimeField('дата изменения')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        verbose_name='Автор',
+        related_name='archived_posts'
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        verbose_name='Группа',
+        blank=True,
+        null=True,
+        related_name='archived_posts'
+    )
+    image = models.ImageField('Картинка', upload_to='posts/', blank=True)
+    views = models.PositiveIntegerField('просмотры', default=0)
+    archived = models.DateTimeField('дата архивации', auto_now_add=True)
+
+    class Meta:
+        ordering = ['-pub_date', '-id']
+        indexes = [
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='archived_post_author_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return self.text
+
+
+class ArchivedComment(models.Model):
+    """Комментарий архивного поста."""
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        verbose_name='Коментарий к посту',
+        related_name='comments'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        verbose_name='Автор комментария',
+        related_name='archived_comments'
+    )
+    text = models.TextField('Текст')
+    created = models.DateTimeField('дата публикации')
+
+    class Meta:
+        ordering = ['-created', '-id']
+        indexes = [
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='archived_comment_post_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return self.text
+
+
+class PostCounter(models.Model):
+    """Число постов в ленте: общей, группы или автора.
+
+    Создаётся точным подсчётом при первом обращении, дальше
+    обновляется сигналами при создании, удалении и переносе постов
+    и периодически пересчитывается заново.
+    """
+    key = models.CharField('лента', max_length=50, primary_key=True)
+    value = models.IntegerField('постов', default=0)
+    counted = models.DateTimeField('точный подсчёт', default=timezone.now)
+
+    def __str__(self):
+        return f'{self.key}: {self.value}'
@@ -0,0 +1,114 @@
+from collections import defaultdict
+
+from django.core.mail import EmailMessage, get_connection
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.tasks import enqueue, task
+from yatube.settings import (DEFAULT_FROM_EMAIL, DIGEST_BATCH_SIZE,
+                             DIGEST_MAX_POSTS)
+
+from .models import DigestState, Follow, Post, User
+
+DIGEST_SUBJECT = 'Новые посты ваших авторов'
+
+
+def digest_message(user, posts):
+    body = render_to_string(
+        'posts/email/digest.txt', {'user': user, 'posts': posts}
+    )
+    return EmailMessage(
+        DIGEST_SUBJECT, body, DEFAULT_FROM_EMAIL, [user.email]
+    )
+
+
+@task
+def send_digest_batch(user_ids, until):
+    """Отправляет дайджесты пачке пользователей через одно соединение.
+
+    Посты всех авторов пачки загружаются одним запросом и делятся
+    между подписчиками в Python. Писем в памяти не больше, чем
+    пользователей в пачке.
+    """
+    until = parse_datetime(until)
+    authors = defaultdict(list)
+    follows = Follow.objects.filter(user_id__in=user_ids).values_list(
+        'user', 'author'
+    )
+    for user_id, author_id in follows:
+        authors[user_id].append(author_id)
+    sent = dict(
+        DigestState.objects.filter(user_id__in=user_ids).values_list(
+            'user', 'last_sent'
+        )
+    )
+    # Пользователи, удалённые после постановки пачки в очередь,
+    # сюда не попадут, и состояние для них не создаётся
+    users = list(User.objects.filter(pk__in=user_ids).only(
+        'pk', 'username', 'email', 'first_name', 'last_name', 'date_joined'
+    ))
+    since = {
+        user.pk: sent.get(user.pk, user.date_joined)
+        for user in users if user.email
+    }
+    by_author = defaultdict(list)
+    if since:
+        posts = Post.objects.filter(
+            author_id__in={
+                author_id for user_id in since
+                for author_id in authors[user_id]
+            },
+            pub_date__gt=min(since.values()),
+            pub_date__lte=until,
+        ).select_related('author')
+        for post in posts.iterator():
+            by_author[post.author_id].append(post)
+    messages = []
+    for user in users:
+        if user.pk not in since:
+            continue
+        posts = sorted(
+            (
+                post for author_id in authors[user.pk]
+                for post in by_author[author_id]
+                if post.pub_date > since[user.pk]
+            ),
+            key=lambda post: (post.pub_date, post.pk),
+            reverse=True
+        )[:DIGEST_MAX_POSTS]
+        if posts:
+            messages.append(digest_message(user, posts))
+    with get_connection() as connection:
+        connection.send_messages(messages)
+    DigestState.objects.filter(user_id__in=sent).update(last_sent=until)
+    DigestState.objects.bulk_create(
+        [
+            DigestState(user_id=user.pk, last_sent=until)
+            for user in users if user.pk not in sent
+        ]
+    )
+    return len(messages)
+
+
+def send_digests(batch_size=DIGEST_BATCH_SIZE):
+    """Ставит в очередь отправку дайджестов всем подписчикам пачками.
+
+    Возвращает количество пачек.
+    """
+    until = timezone.now().isoformat()
+    followers = Follow.objects.order_by('user').values_list(
+        'user', flat=True
+    ).distinct()
+    batch = []
+    batches = 0
+    for user_id in followers.iterator():
+        batch.append(user_id)
+        if len(batch) == batch_size:
+            enqueue(send_digest_batch, user_ids=batch, until=until)
+            batch = []
+            batches += 1
+    if batch:
+        enqueue(send_digest_batch, user_ids=batch, until=until)
+        batches += 1
+    return batches
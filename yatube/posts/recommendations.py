@@ -0,0 +1,94 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+
+from yatube.settings import RECOMMENDATIONS_COUNT, RECOMMENDATIONS_STORED
+
+from .follow_graph import following_ids
+from .models import Follow, FollowRecommendation, Post
+
+# Веса сигналов: подписки тех, на кого подписан пользователь,
+# подписки его "соседей" по авторам и общие группы.
+FRIENDS_OF_FRIENDS_WEIGHT = 3.0
+CO_FOLLOW_WEIGHT = 1.0
+GROUP_WEIGHT = 0.5
+
+
+def load_graph():
+    """Граф подписок и авторов групп в виде разреженных списков смежности."""
+    following = defaultdict(set)
+    followers = defaultdict(set)
+    for user_id, author_id in Follow.objects.values_list('user', 'author'):
+        following[user_id].add(author_id)
+        followers[author_id].add(user_id)
+    group_authors = defaultdict(set)
+    author_groups = defaultdict(set)
+    pairs = Post.objects.filter(group__isnull=False).values_list(
+        'author', 'group'
+    ).distinct()
+    for author_id, group_id in pairs.order_by():
+        group_authors[group_id].add(author_id)
+        author_groups[author_id].add(group_id)
+    return following, followers, group_authors, author_groups
+
+
+def score_candidates(user_id, following, followers, group_authors,
+                     author_groups):
+    """Считает веса кандидатов для одного пользователя."""
+    scores = Counter()
+    followed = following.get(user_id, set())
+    for author_id in followed:
+        for candidate in following.get(author_id, ()):
+            scores[candidate] += FRIENDS_OF_FRIENDS_WEIGHT
+        for neighbour in followers.get(author_id, ()):
+            if neighbour == user_id:
+                continue
+            for candidate in following.get(neighbour, ()):
+                scores[candidate] += CO_FOLLOW_WEIGHT
+    for group_id in author_groups.get(user_id, ()):
+        for candidate in group_authors[group_id]:
+            scores[candidate] += GROUP_WEIGHT
+    scores.pop(user_id, None)
+    for author_id in followed:
+        scores.pop(author_id, None)
+    return scores.most_common(RECOMMENDATIONS_STORED)
+
+
+def build_recommendations(user_ids=None, batch_size=500):
+    """Пересчитывает рекомендации и сохраняет их пачками.
+
+    Возвращает количество обработанных пользователей.
+    """
+    graph = load_graph()
+    following, _, _, author_groups = graph
+    if user_ids is None:
+        stale = FollowRecommendation.objects.order_by().values_list(
+            'user', flat=True
+        ).distinct()
+        user_ids = sorted(set(following) | set(author_groups) | set(stale))
+    processed = 0
+    for start in range(0, len(user_ids), batch_size):
+        batch = user_ids[start:start + batch_size]
+        rows = [
+            FollowRecommendation(user_id=user_id, author_id=author_id,
+                                 score=score)
+            for user_id in batch
+            for author_id, score in score_candidates(user_id, *graph)
+        ]
+        with transaction.atomic():
+            FollowRecommendation.objects.filter(user_id__in=batch).delete()
+            FollowRecommendation.objects.bulk_create(rows)
+        processed += len(batch)
+    return processed
+
+
+def recommendations_for(user, limit=RECOMMENDATIONS_COUNT):
+    """Готовые рекомендации для пользователя без уже подписанных авторов."""
+    if not user.is_authenticated:
+        return []
+    followed = following_ids(user.pk)
+    # Подписки, сделанные после пересчёта, отсеиваем здесь
+    items = FollowRecommendation.objects.filter(user=user).select_related(
+        'author'
+    )[:RECOMMENDATIONS_STORED]
+    return [item for item in items if item.author_id not in followed][:limit]
@@ -0,0 +1,62 @@
+import hashlib
+
+from django.core.cache import cache
+from django.utils.html import linebreaks, urlize
+from django.utils.safestring import mark_safe
+
+from yatube.settings import RENDERED_TEXT_TIMEOUT
+
+
+def render_text(text):
+    """Превращает текст в HTML: экранирование, ссылки и переносы строк."""
+    return mark_safe(linebreaks(urlize(text, nofollow=True, autoescape=True)))
+
+
+def text_version(obj):
+    """Версия текста объекта.
+
+    Для моделей с датой изменения это её отметка, для остальных
+    (комментарии не редактируются) - короткий хэш текста.
+    """
+    version = getattr(obj, 'version', None)
+    if version is not None:
+        return version
+    return hashlib.md5(obj.text.encode()).hexdigest()[:12]
+
+
+def rendered_key(obj):
+    return 'rendered:{}:{}:{}'.format(
+        obj._meta.label_lower, obj.pk, text_version(obj)
+    )
+
+
+def cache_rendered(obj):
+    """Рендерит текст объекта и кладёт результат в кэш."""
+    html = render_text(obj.text)
+    cache.set(rendered_key(obj), str(html), RENDERED_TEXT_TIMEOUT)
+    obj._rendered_text = html
+    return html
+
+
+def get_rendered(obj):
+    """Готовый HTML текста поста или комментария."""
+    html = getattr(obj, '_rendered_text', None)
+    if html is not None:
+        return html
+    html = cache.get(rendered_key(obj))
+    if html is None:
+        return cache_rendered(obj)
+    obj._rendered_text = mark_safe(html)
+    return obj._rendered_text
+
+
+def prefetch_rendered(objects):
+    """Достаёт HTML для списка объектов одним запросом к кэшу."""
+    keys = {rendered_key(obj): obj for obj in objects}
+    found = cache.get_many(list(keys))
+    for key, obj in keys.items():
+        if key in found:
+            obj._rendered_text = mark_safe(found[key])
+        else:
+            cache_rendered(obj)
+    return objects
@@ -0,0 +1,112 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from core.tasks import enqueue
+
+from . import counters, tasks
+from .directory import invalidate_directory
+from .follow_graph import load_following
+from .lookups import LOOKUPS, forget
+from .models import Comment, Follow, Group, Post, User
+from .rendering import cache_rendered
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+def render_text_on_save(sender, instance, **kwargs):
+    """Готовим HTML текста сразу при сохранении."""
+    cache_rendered(instance)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def refresh_following(sender, instance, **kwargs):
+    """Подписки изменились - перечитываем их в кэш."""
+    load_following(instance.user_id)
+
+
+@receiver(post_save, sender=Post)
+def trending_post(sender, instance, created, **kwargs):
+    if created:
+        enqueue(tasks.record_post, post_id=instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def trending_comment(sender, instance, created, **kwargs):
+    if created:
+        enqueue(tasks.record_comment, comment_id=instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+def trending_follow(sender, instance, created, **kwargs):
+    if created:
+        enqueue(tasks.record_follow, follow_id=instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def refresh_directory(sender, **kwargs):
+    """Посты или группы изменились - каталог групп устарел."""
+    invalidate_directory()
+
+
+@receiver(post_init, sender=Group)
+@receiver(post_init, sender=User)
+def remember_lookup_value(sender, instance, **kwargs):
+    """Запоминаем слаг или имя, чтобы при переименовании сбросить
+    запись под старым значением."""
+    field = LOOKUPS[sender][0]
+    # Отложенное поле не трогаем, чтобы не вызвать лишний запрос
+    instance._lookup_value = instance.__dict__.get(field)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=User)
+def refresh_lookup(sender, instance, **kwargs):
+    """Группа или пользователь переименованы или удалены."""
+    field = LOOKUPS[sender][0]
+    forget(sender, getattr(instance, field))
+    old = instance._lookup_value
+    if old is not None and old != getattr(instance, field):
+        forget(sender, old)
+    instance._lookup_value = getattr(instance, field)
+
+
+@receiver(post_delete, sender=User)
+def purge_archive(sender, instance, **kwargs):
+    """Архив не связан с пользователем каскадом - чистим его в фоне."""
+    enqueue(tasks.purge_user_archive, user_id=instance.pk)
+
+
+@receiver(post_init, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    # Отложенное поле не трогаем, чтобы не вызвать лишний запрос
+    instance._counter_group_id = instance.__dict__.get('group_id')
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, **kwargs):
+    """Новый пост или перенос в другую группу меняют счётчики."""
+    old, new = instance._counter_group_id, instance.group_id
+    if created:
+        counters.add(counters.post_keys(instance, new), 1)
+    elif old != new and 'group_id' in instance.__dict__:
+        if old:
+            counters.add([counters.group_key(old)], -1)
+        if new:
+            counters.add([counters.group_key(new)], 1)
+    instance._counter_group_id = new
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.add(counters.post_keys(instance, instance.group_id), -1)
+
+
+@receiver(post_delete, sender=Group)
+def forget_group_counter(sender, instance, **kwargs):
+    counters.forget([counters.group_key(instance.pk)])
@@ -0,0 +1,43 @@
+from sorl.thumbnail import get_thumbnail
+
+from core.tasks import task
+
+from . import archive, trending
+from .models import Comment, Follow, Post
+# Задачи из других модулей регистрируются при импорте
+from .deletion import delete_group, delete_user  # noqa: F401
+from .notifications import send_digest_batch  # noqa: F401
+
+
+@task
+def make_thumbnail(post_id):
+    """Заранее готовит миниатюру, которую используют шаблоны постов."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None and post.image:
+        get_thumbnail(post.image, '960x339', crop='center', upscale=True)
+
+
+@task
+def record_post(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        trending.record_post(post)
+
+
+@task
+def record_comment(comment_id):
+    comment = Comment.objects.filter(pk=comment_id).first()
+    if comment is not None:
+        trending.record_comment(comment)
+
+
+@task
+def record_follow(follow_id):
+    follow = Follow.objects.filter(pk=follow_id).first()
+    if follow is not None:
+        trending.record_follow(follow)
+
+
+@task
+def purge_user_archive(user_id):
+    archive.purge_user_archive(user_id)
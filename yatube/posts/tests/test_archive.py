@@ -0,0 +1,66 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..archive import archive_posts
+from ..models import ArchivedComment, ArchivedPost, Comment, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(TASKS_EAGER=True)
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='описание'
+        )
+        self.old = Post.objects.create(
+            author=self.author, text='старый', group=self.group
+        )
+        self.fresh = Post.objects.create(author=self.author, text='новый')
+        Post.objects.filter(pk=self.old.pk).update(
+            pub_date=timezone.now() - timedelta(days=400)
+        )
+        for text in ('первый', 'второй', 'третий'):
+            Comment.objects.create(
+                post=self.old, author=self.reader, text=text
+            )
+
+    def test_archive_moves_old_posts(self):
+        """Старые посты с комментариями переезжают в архив пачками"""
+        self.assertEqual(archive_posts(days=365, chunk_size=1), 1)
+        self.assertFalse(Post.objects.filter(pk=self.old.pk).exists())
+        self.assertTrue(Post.objects.filter(pk=self.fresh.pk).exists())
+        archived = ArchivedPost.objects.get(pk=self.old.pk)
+        self.assertEqual(archived.text, 'старый')
+        self.assertEqual(archived.group, self.group)
+        self.assertEqual(archived.comments.count(), 3)
+        self.assertFalse(Comment.objects.exists())
+
+    def test_archived_post_viewable(self):
+        """Архивный пост открывается по старой ссылке без формы"""
+        archive_posts(days=365)
+        self.client.force_login(self.reader)
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.old.pk])
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['archived'])
+        self.assertIsNone(response.context['form'])
+        self.assertContains(response, 'второй')
+        self.assertNotContains(
+            response, reverse('posts:add_comment', args=[self.old.pk])
+        )
+
+    def test_user_delete_purges_archive(self):
+        """Удаление пользователя чистит его записи в архиве"""
+        archive_posts(days=365)
+        self.reader.delete()
+        self.assertFalse(ArchivedComment.objects.exists())
+        self.author.delete()
+        self.assertFalse(ArchivedPost.objects.exists())
@@ -0,0 +1,358 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError
+from django.db.models import QuerySet
+from django.http import Http404
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import counters
+from ..directory import group_directory
+from ..follow_graph import following_ids, following_map, is_following
+from ..lookups import get_group_or_404, get_user_or_404, local, lookup_key
+from ..models import Comment, Follow, Group, Post, PostCounter
+from ..rendering import get_rendered, rendered_key
+from ..view_counts import flush, pending_views, record_view
+
+User = get_user_model()
+
+
+class RenderedTextTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_rendered_on_save(self):
+        """HTML текста попадает в кэш при сохранении"""
+        post = Post.objects.create(
+            author=self.user,
+            text='Первая строка\n<b>вторая</b> https://example.com',
+        )
+        html = cache.get(rendered_key(post))
+        self.assertIn('<br>', html)
+        self.assertIn('&lt;b&gt;', html)
+        self.assertIn('href="https://example.com"', html)
+
+    def test_edit_changes_key(self):
+        """После изменения текста используется новая версия"""
+        post = Post.objects.create(author=self.user, text='старый')
+        post.text = 'новый'
+        post.save()
+        post = Post.objects.get(pk=post.pk)
+        self.assertIn('новый', get_rendered(post))
+
+    def test_comment_rendered(self):
+        """Комментарии тоже кэшируются"""
+        post = Post.objects.create(author=self.user, text='пост')
+        comment = Comment.objects.create(
+            post=post, author=self.user, text='коммент'
+        )
+        self.assertEqual(
+            cache.get(rendered_key(comment)), '<p>коммент</p>'
+        )
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='follower')
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_follow_updates_cache(self):
+        """Подписка и отписка сразу видны в кэше"""
+        self.assertFalse(is_following(self.user, self.author))
+        follow = Follow.objects.create(user=self.user, author=self.author)
+        self.assertTrue(is_following(self.user, self.author))
+        follow.delete()
+        self.assertFalse(is_following(self.user, self.author))
+
+    def test_lookups_without_queries(self):
+        """Проверки подписки не ходят в базу, когда кэш заполнен"""
+        Follow.objects.create(user=self.user, author=self.author)
+        with self.assertNumQueries(0):
+            self.assertEqual(following_ids(self.user.pk), {self.author.pk})
+            self.assertEqual(
+                following_map(self.user, [self.author.pk, self.other.pk]),
+                {self.author.pk: True, self.other.pk: False}
+            )
+
+
+class ViewCountTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.post = Post.objects.create(author=cls.user, text='текст')
+
+    def setUp(self):
+        flush()
+
+    def test_views_buffered(self):
+        """Просмотры копятся в памяти и пишутся в базу пачкой"""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertEqual(response.context['views'], 2)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 0)
+        with self.assertNumQueries(3):
+            self.assertEqual(flush(), 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 2)
+
+    def test_failed_flush_keeps_views(self):
+        """Если база занята, просмотры остаются в буфере"""
+        record_view(self.post.pk)
+        with mock.patch.object(
+            QuerySet, 'update', side_effect=OperationalError('locked')
+        ):
+            self.assertEqual(flush(), 0)
+        self.assertEqual(pending_views(self.post.pk), 1)
+        flush()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 1)
+
+    def test_save_keeps_flushed_views(self):
+        """Сохранение поста не затирает записанные просмотры"""
+        post = Post.objects.get(pk=self.post.pk)
+        record_view(post.pk)
+        flush()
+        post.text = 'исправленный'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.views, 1)
+
+
+class IndexFragmentTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {i}') for i in range(13)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_shared_body_per_user_switcher(self):
+        """Общий кэш списка не прячет переключатель от авторизованных"""
+        self.client.get(reverse('posts:index'))
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, reverse('posts:follow_index'))
+
+    @override_settings(POST_COUNTER_EXACT_BELOW=0)
+    def test_cached_page_skips_queries(self):
+        """При попадании в кэш посты и комментарии не загружаются"""
+        self.client.get(reverse('posts:index'))
+        with self.assertNumQueries(1):
+            self.client.get(reverse('posts:index'))
+
+    def test_pages_cached_separately(self):
+        """Страницы пагинатора кэшируются отдельно"""
+        first = self.client.get(reverse('posts:index'))
+        second = self.client.get(reverse('posts:index') + '?page=2')
+        self.assertNotEqual(first.content, second.content)
+
+
+class GroupDirectoryTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='описание'
+        )
+        cls.empty = Group.objects.create(
+            title='Пустая', slug='empty', description='описание'
+        )
+        Post.objects.create(author=cls.author, text='1', group=cls.group)
+        Post.objects.create(author=cls.author, text='2', group=cls.group)
+        Post.objects.create(author=cls.other, text='3', group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_statistics(self):
+        """Каталог считает посты и авторов групп"""
+        with self.assertNumQueries(2):
+            group, empty = group_directory()
+        self.assertEqual(group['posts_count'], 3)
+        self.assertEqual(group['authors'], ['author', 'other'])
+        self.assertIsNotNone(group['last_post'])
+        self.assertEqual(empty['posts_count'], 0)
+        self.assertIsNone(empty['last_post'])
+        with self.assertNumQueries(0):
+            group_directory()
+
+    def test_invalidated_on_post_changes(self):
+        """Новый или удалённый пост сбрасывает каталог"""
+        group_directory()
+        post = Post.objects.create(
+            author=self.other, text='4', group=self.empty
+        )
+        self.assertEqual(group_directory()[1]['posts_count'], 1)
+        post.delete()
+        self.assertEqual(group_directory()[1]['posts_count'], 0)
+
+    def test_page(self):
+        """Страница каталога показывает группы"""
+        response = self.client.get(reverse('posts:group_index'))
+        self.assertContains(
+            response, reverse('posts:group_post', args=['group'])
+        )
+        self.assertEqual(len(response.context['groups']), 2)
+
+
+class LookupCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='описание'
+        )
+
+    def setUp(self):
+        cache.clear()
+        local.clear()
+
+    def test_cached_lookup(self):
+        """Повторный поиск группы по слагу не ходит в базу"""
+        get_group_or_404('group')
+        with self.assertNumQueries(0):
+            group = get_group_or_404('group')
+        self.assertEqual(group.pk, self.group.pk)
+        self.assertEqual(group.title, 'Группа')
+
+    def test_rename_and_delete(self):
+        """Переименование и удаление сбрасывают запись"""
+        get_group_or_404('group')
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'renamed'
+        group.save()
+        with self.assertRaises(Http404):
+            get_group_or_404('group')
+        self.assertEqual(get_group_or_404('renamed').pk, self.group.pk)
+        group.delete()
+        with self.assertRaises(Http404):
+            get_group_or_404('renamed')
+
+    def test_key_safe_for_memcached(self):
+        """Ключ кэша не зависит от символов в имени"""
+        key = lookup_key(User, 'Имя с пробелами ' * 20)
+        self.assertLessEqual(len(key), 250)
+        self.assertRegex(key, r'^[\x21-\x7e]+$')
+
+    def test_follow_author_from_cache(self):
+        """Подписка находит автора по имени из кэша"""
+        author = User.objects.create_user(username='author')
+        self.client.force_login(self.user)
+        url = reverse('posts:profile_follow', args=[author.username])
+        self.client.get(url)
+        self.assertTrue(
+            Follow.objects.filter(user=self.user, author=author).exists()
+        )
+
+    def test_follow_deleted_author(self):
+        """Подписка на удалённого автора из кэша даёт 404, а не 500"""
+        author = User.objects.create_user(username='gone')
+        get_user_or_404('gone')
+        User.objects.filter(pk=author.pk)._raw_delete('default')
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse('posts:profile_follow', args=['gone'])
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Follow.objects.filter(user=self.user).exists())
+
+
+@override_settings(POST_COUNTER_EXACT_BELOW=0)
+class PostCounterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.first = Group.objects.create(
+            title='Первая', slug='first', description='описание'
+        )
+        cls.second = Group.objects.create(
+            title='Вторая', slug='second', description='описание'
+        )
+        Post.objects.create(author=cls.user, text='1', group=cls.first)
+        Post.objects.create(author=cls.user, text='2')
+
+    def test_counters_follow_changes(self):
+        """Счётчики заводятся точно и следуют за постами"""
+        self.assertEqual(counters.index_count(), 2)
+        self.assertEqual(counters.group_count(self.first.pk), 1)
+        self.assertEqual(counters.author_count(self.user.pk), 2)
+        post = Post.objects.create(
+            author=self.user, text='3', group=self.first
+        )
+        with self.assertNumQueries(1):
+            self.assertEqual(counters.index_count(), 3)
+        self.assertEqual(counters.group_count(self.first.pk), 2)
+        post.group = self.second
+        post.save()
+        self.assertEqual(counters.group_count(self.first.pk), 1)
+        self.assertEqual(counters.group_count(self.second.pk), 1)
+        post.delete()
+        self.assertEqual(counters.index_count(), 2)
+        self.assertEqual(counters.group_count(self.second.pk), 0)
+        self.assertEqual(counters.author_count(self.user.pk), 2)
+
+    def test_authors_count(self):
+        """Лента подписок суммирует счётчики авторов"""
+        other = User.objects.create_user(username='other')
+        Post.objects.create(author=other, text='чужой')
+        self.assertEqual(counters.authors_count([self.user.pk, other.pk]), 3)
+        with self.assertNumQueries(1):
+            counters.authors_count([self.user.pk, other.pk])
+        self.assertEqual(counters.authors_count([]), 0)
+
+    def test_paginator_uses_counter(self):
+        """Пагинатор главной берёт число постов из счётчика"""
+        PostCounter.objects.create(key=counters.INDEX_KEY, value=25)
+        cache.clear()
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.context['page_obj'].paginator.count, 25)
+
+    def test_stale_counter_recounted(self):
+        """Сбитый счётчик исправляется пересчётом по истечении периода"""
+        counters.index_count()
+        PostCounter.objects.filter(key=counters.INDEX_KEY).update(value=7)
+        self.assertEqual(counters.index_count(), 7)
+        PostCounter.objects.filter(key=counters.INDEX_KEY).update(
+            counted=timezone.now() - timedelta(days=1)
+        )
+        self.assertEqual(counters.index_count(), 2)
+        self.assertEqual(
+            PostCounter.objects.get(key=counters.INDEX_KEY).value, 2
+        )
+
+    @override_settings(POST_COUNTER_EXACT_BELOW=100)
+    def test_small_feeds_exact(self):
+        """Небольшие ленты считаются точно и чинят счётчик"""
+        counters.index_count()
+        PostCounter.objects.filter(key=counters.INDEX_KEY).update(value=7)
+        self.assertEqual(counters.index_count(), 2)
+        self.assertEqual(
+            PostCounter.objects.get(key=counters.INDEX_KEY).value, 2
+        )
+        self.assertEqual(counters.authors_count([self.user.pk]), 2)
@@ -0,0 +1,116 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.tasks import run_pending
+
+from .. import counters
+from ..deletion import (deletion_progress, delete_user,
+                        schedule_group_deletion, schedule_user_deletion)
+from ..follow_graph import following_ids
+from ..models import Comment, Follow, Group, Post, PostScore
+
+User = get_user_model()
+
+
+@override_settings(TASKS_EAGER=True)
+class DeletionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='описание'
+        )
+        self.posts = [
+            Post.objects.create(
+                author=self.author, text=f'Пост {i}', group=self.group
+            )
+            for i in range(5)
+        ]
+        self.other = Post.objects.create(author=self.reader, text='чужой')
+        for post in self.posts:
+            Comment.objects.create(post=post, author=self.reader, text='к')
+        Comment.objects.create(post=self.other, author=self.author, text='к')
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def test_user_deleted_in_chunks(self):
+        """Пользователь и его записи удаляются пачками"""
+        self.assertEqual(following_ids(self.reader.pk), {self.author.pk})
+        self.assertEqual(counters.index_count(), 6)
+        schedule_user_deletion(self.author)
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertFalse(Post.objects.filter(author=self.author).exists())
+        self.assertFalse(Comment.objects.filter(author=self.author).exists())
+        self.assertEqual(Comment.objects.count(), 0)
+        self.assertFalse(
+            PostScore.objects.filter(
+                pk__in=[post.pk for post in self.posts]
+            ).exists()
+        )
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(following_ids(self.reader.pk), frozenset())
+        self.assertTrue(Post.objects.filter(pk=self.other.pk).exists())
+        self.assertEqual(counters.index_count(), 1)
+        progress = deletion_progress(User, self.author.pk)
+        self.assertTrue(progress['done'])
+        self.assertGreater(progress['deleted'], 10)
+
+    def test_small_chunks(self):
+        """Размер пачки не влияет на результат"""
+        delete_user(self.author.pk, chunk_size=2)
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_group_deleted(self):
+        """Посты удалённой группы остаются без группы"""
+        schedule_group_deletion(self.group)
+        self.assertFalse(Group.objects.exists())
+        self.assertEqual(Post.objects.filter(group__isnull=True).count(), 6)
+        self.assertTrue(deletion_progress(Group, self.group.pk)['done'])
+
+    def test_admin_delete(self):
+        """Удаление из админки идёт через фоновую задачу"""
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.client.force_login(admin)
+        url = reverse('admin:auth_user_delete', args=[self.author.pk])
+        # сессия, админ, удаляемый пользователь, SAVEPOINT и RELEASE
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.client.post(url, {'post': 'yes'})
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertTrue(deletion_progress(User, self.author.pk)['done'])
+
+    @override_settings(TASKS_EAGER=False)
+    def test_progress_visible_without_cache(self):
+        """Ход удаления хранится в базе, а не в кэше процесса"""
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.client.force_login(admin)
+        schedule_group_deletion(self.group)
+        cache.clear()
+        response = self.client.get(reverse('admin:posts_group_changelist'))
+        self.assertContains(response, 'удаляется: 0')
+        response = self.client.get(reverse('admin:auth_user_changelist'))
+        self.assertEqual(response.status_code, 200)
+        run_pending()
+        self.assertTrue(deletion_progress(Group, self.group.pk)['done'])
+
+    def test_admin_delete_needs_cascade_permissions(self):
+        """Без права на удаление постов пользователя удалить нельзя"""
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        staff.user_permissions.add(
+            Permission.objects.get(codename='delete_user'),
+            Permission.objects.get(codename='view_user'),
+        )
+        self.client.force_login(staff)
+        url = reverse('admin:auth_user_delete', args=[self.author.pk])
+        response = self.client.post(url, {'post': 'yes'})
+        self.assertEqual(response.status_code, 403)
+        self.assertTrue(User.objects.filter(pk=self.author.pk).exists())
@@ -81,3 +81,37 @@ class PostModelTest(TestCase):
             with self.subTest(value=value):
                 self.assertEqual(
                     self.post._meta.get_field(value).help_text, expected)
+
+
+class UpdatedFieldTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def test_updated_changes_on_save(self):
+        """Дата изменения и версия обновляются при сохранении"""
+        post = Post.objects.create(author=self.user, text='текст')
+        version = post.version
+        list_version = Post.objects.version()
+        post.text = 'новый текст'
+        post.save()
+        self.assertNotEqual(post.version, version)
+        self.assertNotEqual(Post.objects.version(), list_version)
+        self.assertEqual(Post.objects.last_modified(), post.updated)
+
+    def test_empty_list_version(self):
+        """Пустая выборка имеет версию 0"""
+        self.assertEqual(Group.objects.none().version(), '0')
+        self.assertIsNone(Group.objects.last_modified())
+
+
+class OrderingTest(TestCase):
+    def test_same_pub_date_stable(self):
+        """Посты с одинаковым временем упорядочены по id"""
+        user = User.objects.create_user(username='auth')
+        first = Post.objects.create(author=user, text='первый')
+        second = Post.objects.create(author=user, text='второй')
+        Post.objects.update(pub_date=first.pub_date)
+        self.assertEqual(list(Post.objects.all()), [second, first])
+        self.assertEqual(list(user.posts.all()), [second, first])
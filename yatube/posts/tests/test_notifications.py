@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..models import DigestState, Follow, Post
+from ..notifications import send_digest_batch, send_digests
+
+User = get_user_model()
+
+
+@override_settings(
+    TASKS_EAGER=True,
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'
+)
+class DigestTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(
+            username='reader', email='reader@example.com'
+        )
+        cls.other = User.objects.create_user(
+            username='other', email='other@example.com'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Follow.objects.create(user=cls.other, author=cls.reader)
+
+    def test_digest_sent_once(self):
+        """Подписчик получает одно письмо с новыми постами"""
+        Post.objects.create(author=self.author, text='новый пост')
+        Post.objects.create(author=self.author, text='ещё пост')
+        self.assertEqual(send_digests(batch_size=1), 2)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['reader@example.com'])
+        self.assertIn('ещё пост', mail.outbox[0].body)
+        self.assertEqual(DigestState.objects.count(), 2)
+        send_digests()
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_old_posts_skipped(self):
+        """Посты, вышедшие до прошлой рассылки, не попадают в письмо"""
+        Post.objects.create(author=self.author, text='старый пост')
+        DigestState.objects.create(
+            user=self.reader, last_sent=timezone.now() + timedelta(seconds=1)
+        )
+        send_digests()
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_batch_query_budget(self):
+        """Посты для всей пачки загружаются одним запросом"""
+        readers = [self.reader]
+        for number in range(3):
+            author = User.objects.create_user(username=f'author{number}')
+            reader = User.objects.create_user(
+                username=f'reader{number}', email=f'r{number}@example.com'
+            )
+            Follow.objects.create(user=reader, author=author)
+            Follow.objects.create(user=reader, author=self.author)
+            Post.objects.create(author=author, text=f'пост {number}')
+            readers.append(reader)
+        Post.objects.create(author=self.author, text='общий пост')
+        until = (timezone.now() + timedelta(seconds=1)).isoformat()
+        # подписки, состояния, пользователи, посты и создание
+        # состояний; обновлять пока нечего
+        with self.assertNumQueries(5):
+            sent = send_digest_batch(
+                user_ids=[reader.pk for reader in readers], until=until
+            )
+        self.assertEqual(sent, 4)
+        body = next(
+            message.body for message in mail.outbox
+            if message.to == ['r2@example.com']
+        )
+        self.assertIn('пост 2', body)
+        self.assertIn('общий пост', body)
+        self.assertNotIn('пост 1', body)
+
+    def test_deleted_user_in_batch(self):
+        """Удалённый после постановки в очередь пользователь пропускается"""
+        gone = User.objects.create_user(username='gone', email='g@e.com')
+        user_ids = [self.reader.pk, gone.pk]
+        gone.delete()
+        send_digest_batch(
+            user_ids=user_ids, until=timezone.now().isoformat()
+        )
+        self.assertEqual(
+            list(DigestState.objects.values_list('user', flat=True)),
+            [self.reader.pk]
+        )
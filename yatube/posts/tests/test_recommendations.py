@@ -0,0 +1,54 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import Follow, FollowRecommendation, Group, Post
+from ..recommendations import build_recommendations, recommendations_for
+
+User = get_user_model()
+
+
+class RecommendationsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.friend = User.objects.create_user(username='friend')
+        cls.friend_of_friend = User.objects.create_user(username='fof')
+        cls.group_mate = User.objects.create_user(username='group_mate')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='описание'
+        )
+        Follow.objects.create(user=cls.user, author=cls.friend)
+        Follow.objects.create(user=cls.friend, author=cls.friend_of_friend)
+        Post.objects.create(author=cls.user, text='пост', group=cls.group)
+        Post.objects.create(
+            author=cls.group_mate, text='пост', group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_ranked_candidates(self):
+        """Друзья друзей выше соседей по группе, подписки исключены"""
+        build_recommendations()
+        authors = [item.author for item in recommendations_for(self.user)]
+        self.assertEqual(authors, [self.friend_of_friend, self.group_mate])
+
+    def test_new_follow_hidden(self):
+        """Автор, на которого подписались после пересчёта, не показывается"""
+        call_command('build_recommendations', stdout=StringIO())
+        Follow.objects.create(user=self.user, author=self.friend_of_friend)
+        authors = [item.author for item in recommendations_for(self.user)]
+        self.assertEqual(authors, [self.group_mate])
+
+    def test_rebuild_replaces_rows(self):
+        """Повторный пересчёт не дублирует записи"""
+        build_recommendations()
+        build_recommendations()
+        self.assertEqual(
+            FollowRecommendation.objects.filter(user=self.user).count(), 2
+        )
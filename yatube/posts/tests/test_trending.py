@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Group, GroupScore, Post, PostScore
+from ..trending import EPOCH, event_score, log2_add
+
+User = get_user_model()
+
+
+class TrendingScoreTests(TestCase):
+    def test_decay(self):
+        """Событие на период полураспада позже весит вдвое больше"""
+        old = event_score(1, EPOCH)
+        new = event_score(1, EPOCH + timedelta(hours=12))
+        self.assertAlmostEqual(new - old, 1)
+        self.assertAlmostEqual(log2_add(old, old), old + 1)
+
+
+@override_settings(TASKS_EAGER=True)
+class TrendingPageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='описание'
+        )
+        cls.quiet = Post.objects.create(author=cls.user, text='тихий')
+        cls.hot = Post.objects.create(
+            author=cls.user, text='горячий', group=cls.group
+        )
+        Comment.objects.create(post=cls.quiet, author=cls.user, text='1')
+        for text in ('1', '2', '3'):
+            Comment.objects.create(post=cls.hot, author=cls.user, text=text)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_scores_updated_on_create(self):
+        """Рейтинги обновляются при создании постов и комментариев"""
+        self.assertGreater(
+            PostScore.objects.get(post=self.hot).score,
+            PostScore.objects.get(post=self.quiet).score
+        )
+        self.assertTrue(GroupScore.objects.filter(group=self.group).exists())
+
+    def test_trending_page(self):
+        """Страница популярного показывает посты по рейтингу"""
+        response = Client().get(reverse('posts:trending'))
+        self.assertEqual(response.context['posts'], [self.hot, self.quiet])
+        self.assertEqual(response.context['groups'], [self.group])
@@ -1,15 +1,16 @@
 import tempfile
-from time import sleep
 
 from django import forms
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from ..models import Follow, Group, Post
+from ..models import Comment, Follow, Group, Post
 
 User = get_user_model()
 # Создаем временную папку для медиа-файлов;
@@ -44,8 +45,6 @@ class TaskPagesTests(TestCase):
             text='Текст_2',
             group=cls.group_2
         )
-        # без него записи в рандомном порядке каждый раз появляются
-        sleep(0.1)
 
         small_gif = (
             b'\x47\x49\x46\x38\x39\x61\x02\x00'
@@ -329,3 +328,163 @@ class PaginatorTests(TestCase):
                         f'{template}?page={page}')
                     count_objects = len(response.context['page_obj'])
                     self.assertEqual(count_objects, count_post)
+
+
+class ProfileQueriesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='описание'
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.author, text=f'Пост {i}', group=cls.group)
+            for i in range(15)
+        )
+
+    @override_settings(POST_COUNTER_EXACT_BELOW=0)
+    def test_profile_query_budget(self):
+        """Профиль загружается за фиксированное число запросов:
+        счётчик постов, страница постов и комментарии к ней"""
+        url = reverse('posts:profile', args=[self.author.username])
+        # Первый запрос заводит счётчик и кэш поиска автора
+        self.client.get(url)
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.context['posts_count'], 15)
+        self.assertEqual(len(response.context['page_obj']), 10)
+        self.assertEqual(
+            response.context['page_obj'].paginator.num_pages, 2
+        )
+
+
+class ListQueriesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='описание'
+        )
+
+    def setUp(self):
+        self.client.force_login(self.reader)
+
+    def add_rows(self, count):
+        """Посты разных авторов в разных группах и в общей группе"""
+        for _ in range(count):
+            number = User.objects.count()
+            author = User.objects.create_user(username=f'author{number}')
+            group = Group.objects.create(
+                title=f'Группа {number}', slug=f'group{number}'
+            )
+            Post.objects.create(author=author, text='т', group=group)
+            Post.objects.create(author=author, text='т', group=self.group)
+            Follow.objects.create(user=self.reader, author=author)
+
+    def page_queries(self, url):
+        self.client.get(url)
+        # без кэша фрагментов страница загружается заново
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assert_query_budget(self, url):
+        """Число запросов ленты не растёт с числом авторов и групп"""
+        self.add_rows(1)
+        few = self.page_queries(url)
+        self.add_rows(4)
+        self.assertEqual(self.page_queries(url), few)
+
+    def test_index_query_budget(self):
+        self.assert_query_budget(reverse('posts:index'))
+
+    def test_group_query_budget(self):
+        self.assert_query_budget(
+            reverse('posts:group_post', args=[self.group.slug])
+        )
+
+    def test_follow_query_budget(self):
+        self.assert_query_budget(reverse('posts:follow_index'))
+
+
+class LatestCommentsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.posts = [
+            Post.objects.create(author=cls.author, text=f'Пост {i}')
+            for i in range(3)
+        ]
+        for i in range(4):
+            Comment.objects.create(
+                post=cls.posts[0], author=cls.reader, text=f'Коммент {i}'
+            )
+        Comment.objects.create(
+            post=cls.posts[1], author=cls.author, text='Единственный'
+        )
+
+    def test_counts_and_latest(self):
+        """Под постами видно число и последние комментарии"""
+        url = reverse('posts:profile', args=[self.author.username])
+        response = self.client.get(url)
+        posts = {post.pk: post for post in response.context['page_obj']}
+        first = posts[self.posts[0].pk]
+        self.assertEqual(first.comments_count, 4)
+        self.assertEqual(
+            [comment.text for comment in first.latest_comments],
+            ['Коммент 3', 'Коммент 2']
+        )
+        self.assertEqual(posts[self.posts[1].pk].comments_count, 1)
+        self.assertEqual(posts[self.posts[2].pk].latest_comments, [])
+        self.assertContains(response, 'Комментариев: 4')
+        self.assertNotContains(response, 'Коммент 1')
+
+
+class AdminChangelistTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='описание'
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def add_rows(self, count):
+        for _ in range(count):
+            author = User.objects.create_user(
+                username=f'author{User.objects.count()}'
+            )
+            post = Post.objects.create(
+                author=author, text='т', group=self.group
+            )
+            Comment.objects.create(post=post, author=author, text='к')
+            Follow.objects.create(user=self.admin, author=author)
+
+    def changelist_queries(self, url):
+        cache.clear()
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelists_query_budget(self):
+        """Число запросов списков в админке не растёт с числом строк"""
+        for name in ('post', 'comment', 'follow'):
+            url = reverse(f'admin:posts_{name}_changelist')
+            self.add_rows(1)
+            few = self.changelist_queries(url)
+            self.add_rows(5)
+            with self.subTest(name=name):
+                self.assertEqual(self.changelist_queries(url), few)
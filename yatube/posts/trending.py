@@ -0,0 +1,119 @@
+import math
+from datetime import datetime
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from yatube.settings import (TRENDING_CACHE_TIMEOUT, TRENDING_COUNT,
+                             TRENDING_HALF_LIFE)
+
+from .models import Comment, Group, GroupScore, Post, PostScore
+
+# Веса событий
+POST_WEIGHT = 1.0
+COMMENT_WEIGHT = 2.0
+FOLLOW_WEIGHT = 3.0
+
+# Точка отсчёта времени для рейтинга
+EPOCH = datetime(2021, 1, 1, tzinfo=timezone.utc)
+
+POSTS_KEY = 'trending:posts'
+GROUPS_KEY = 'trending:groups'
+
+
+def event_score(weight, when):
+    """Вклад события в log2-шкале.
+
+    Событие, случившееся на период полураспада позже, весит вдвое больше,
+    поэтому старые события "затухают" без пересчёта накопленных сумм.
+    """
+    age = (when - EPOCH).total_seconds() / 3600
+    return math.log2(weight) + age / TRENDING_HALF_LIFE
+
+
+def log2_add(first, second):
+    """log2(2**first + 2**second) без переполнения."""
+    high, low = max(first, second), min(first, second)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def bump(model, pk, weight, when):
+    """Добавляет событие к рейтингу записи."""
+    value = event_score(weight, when)
+    with transaction.atomic():
+        row, created = model.objects.select_for_update().get_or_create(
+            pk=pk, defaults={'score': value}
+        )
+        if not created:
+            row.score = log2_add(row.score, value)
+            row.save(update_fields=['score'])
+
+
+def record_post(post):
+    bump(PostScore, post.pk, POST_WEIGHT, post.pub_date)
+    if post.group_id:
+        bump(GroupScore, post.group_id, POST_WEIGHT, post.pub_date)
+
+
+def record_comment(comment):
+    bump(PostScore, comment.post_id, COMMENT_WEIGHT, comment.created)
+    group_id = Post.objects.filter(pk=comment.post_id).values_list(
+        'group', flat=True
+    ).first()
+    if group_id:
+        bump(GroupScore, group_id, COMMENT_WEIGHT, comment.created)
+
+
+def record_follow(follow):
+    """Новый подписчик поднимает последний пост автора."""
+    post = Post.objects.filter(author_id=follow.author_id).only(
+        'pk', 'group'
+    ).first()
+    if post is None:
+        return
+    now = timezone.now()
+    bump(PostScore, post.pk, FOLLOW_WEIGHT, now)
+    if post.group_id:
+        bump(GroupScore, post.group_id, FOLLOW_WEIGHT, now)
+
+
+def top_ids(model, key):
+    ids = cache.get(key)
+    if ids is None:
+        ids = list(
+            model.objects.order_by('-score').values_list('pk', flat=True)[
+                :TRENDING_COUNT
+            ]
+        )
+        cache.set(key, ids, TRENDING_CACHE_TIMEOUT)
+    return ids
+
+
+def in_order(queryset, ids):
+    objects = queryset.in_bulk(ids)
+    return [objects[pk] for pk in ids if pk in objects]
+
+
+def top_posts():
+    """Популярные посты из заранее посчитанного списка."""
+    return in_order(
+        Post.objects.select_related('author', 'group'),
+        top_ids(PostScore, POSTS_KEY)
+    )
+
+
+def top_groups():
+    """Популярные группы из заранее посчитанного списка."""
+    return in_order(Group.objects.all(), top_ids(GroupScore, GROUPS_KEY))
+
+
+def rebuild():
+    """Полный пересчёт рейтингов по существующим записям."""
+    PostScore.objects.all().delete()
+    GroupScore.objects.all().delete()
+    for post in Post.objects.order_by().iterator():
+        record_post(post)
+    for comment in Comment.objects.order_by().iterator():
+        record_comment(comment)
+    cache.delete_many([POSTS_KEY, GROUPS_KEY])
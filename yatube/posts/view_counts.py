@@ -0,0 +1,70 @@
+"""Счётчик просмотров постов с отложенной записью.
+
+Прибавки копятся в памяти процесса и записываются в базу одним
+UPDATE на каждое значение прибавки, а не по запросу на просмотр.
+Несброшенные прибавки при перезапуске процесса теряются.
+"""
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.db import DatabaseError, transaction
+from django.db.models import F
+
+from yatube.settings import (VIEW_COUNTS_FLUSH_INTERVAL,
+                             VIEW_COUNTS_MAX_PENDING)
+
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+_pending = Counter()
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def record_view(post_id):
+    """Учитывает просмотр; при необходимости сбрасывает буфер в базу."""
+    with _lock:
+        _pending[post_id] += 1
+        due = (
+            len(_pending) >= VIEW_COUNTS_MAX_PENDING
+            or time.monotonic() - _last_flush >= VIEW_COUNTS_FLUSH_INTERVAL
+        )
+    if due:
+        flush()
+
+
+def pending_views(post_id):
+    """Просмотры поста, ещё не записанные в базу."""
+    return _pending.get(post_id, 0)
+
+
+def flush():
+    """Записывает накопленные просмотры. Возвращает число постов.
+
+    Если запись не удалась, прибавки остаются в буфере.
+    """
+    global _last_flush
+    with _lock:
+        batch = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+    by_increment = defaultdict(list)
+    for post_id, increment in batch.items():
+        by_increment[increment].append(post_id)
+    try:
+        with transaction.atomic():
+            for increment, post_ids in by_increment.items():
+                Post.objects.filter(pk__in=post_ids).update(
+                    views=F('views') + increment
+                )
+    except DatabaseError:
+        # База занята - возвращаем прибавки в буфер до следующего сброса,
+        # а просмотр страницы не роняем
+        logger.exception('Не удалось записать просмотры')
+        with _lock:
+            _pending.update(batch)
+        return 0
+    return len(batch)
@@ -1,28 +1,56 @@
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
 from django.shortcuts import get_object_or_404, redirect, render
 
-from yatube.settings import RECORDS_ONE_PAGE
+from core.ratelimit import ratelimit
+from core.tasks import enqueue
 
+from .counters import authors_count, group_count, index_count
+from .directory import group_directory
+from .follow_graph import following_ids
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from .loaders import load_profile, paginator
+from .lookups import exists_or_404, get_group_or_404, get_user_or_404
+from .models import ArchivedPost, Follow, Post
+from .recommendations import recommendations_for
+from .rendering import prefetch_rendered
+from .tasks import make_thumbnail
+from .trending import top_groups, top_posts
+from .view_counts import pending_views, record_view
 
 
 def index(request):
     """Главная"""
-    posts = Post.objects.all()
-    page_obj = paginator(request, posts)
+    posts = Post.objects.select_related('author', 'group')
+    page_obj = paginator(request, posts, index_count())
     context = {
         'page_obj': page_obj,
+        'index': True,
     }
     return render(request, 'posts/index.html', context)
 
 
+def trending(request):
+    """Популярные посты и группы"""
+    context = {
+        'posts': top_posts(),
+        'groups': top_groups(),
+    }
+    return render(request, 'posts/trending.html', context)
+
+
+def group_index(request):
+    """Каталог групп"""
+    context = {
+        'groups': group_directory(),
+    }
+    return render(request, 'posts/group_index.html', context)
+
+
 def group_posts(request, slug):
     """Посты группы"""
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.group_posts.all()
-    page_obj = paginator(request, posts)
+    group = get_group_or_404(slug)
+    posts = group.group_posts.select_related('author', 'group')
+    page_obj = paginator(request, posts, group_count(group.pk))
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -31,39 +59,55 @@ def group_posts(request, slug):
 
 
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    page_obj = paginator(request, posts)
-    following = request.user.is_authenticated and Follow.objects.filter(
-        user=request.user, author=author
-    ).exists()
+    context = load_profile(request, username)
+    context['recommendations'] = recommendations_for(request.user)
+    return render(request, 'posts/profile.html', context)
+
+
+def archived_post_detail(request, post_id):
+    """Пост из архива: только чтение, без новых комментариев."""
+    post = get_object_or_404(
+        ArchivedPost.objects.select_related('author', 'group'), pk=post_id
+    )
+    comments = prefetch_rendered(
+        list(post.comments.select_related('author'))
+    )
     context = {
-        'following': following,
-        'author': author,
-        'page_obj': page_obj,
+        'post': post,
+        'comments': comments,
+        'form': None,
+        'views': post.views,
+        'archived': True,
     }
-    return render(request, 'posts/profile.html', context)
+    return render(request, 'posts/post_detail.html', context)
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.all()
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None:
+        return archived_post_detail(request, post_id)
+    record_view(post.pk)
+    comments = prefetch_rendered(list(post.comments.all()))
     form = CommentForm()
     context = {
         'post': post,
         'comments': comments,
         'form': form,
+        'views': post.views + pending_views(post.pk),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
 @login_required
+@ratelimit('post_create', methods=('POST',))
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         create_item = form.save(commit=False)
         create_item.author = request.user
         create_item.save()
+        if create_item.image:
+            enqueue(make_thumbnail, post_id=create_item.pk)
         return redirect('posts:profile', username=request.user)
     return render(request, 'posts/create_post.html', {'form': form})
 
@@ -84,12 +128,15 @@ def post_edit(request, post_id):
         'is_edit': True,
     }
     if form.is_valid():
-        form.save()
+        post = form.save()
+        if 'image' in form.changed_data and post.image:
+            enqueue(make_thumbnail, post_id=post.pk)
         return redirect('posts:post_detail', post_id=post_id)
     return render(request, 'posts/create_post.html', context)
 
 
 @login_required
+@ratelimit('add_comment')
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
@@ -104,33 +151,32 @@ def add_comment(request, post_id):
 @login_required
 def follow_index(request):
     """будут выведены посты авторов, на которых подписан пользователь"""
-    follow_posts = Post.objects.filter(author__following__user=request.user)
-    page_obj = paginator(request, follow_posts)
+    authors = following_ids(request.user.pk)
+    follow_posts = Post.objects.filter(
+        author_id__in=authors
+    ).select_related('author', 'group')
+    page_obj = paginator(request, follow_posts, authors_count(authors))
     context = {
         'page_obj': page_obj,
+        'recommendations': recommendations_for(request.user),
+        'follow': True,
     }
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+@ratelimit('follow')
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_user_or_404(username)
     if request.user != author:
+        exists_or_404(author, username)
         Follow.objects.get_or_create(user=request.user, author=author)
     return redirect('posts:profile', username)
 
 
 @login_required
+@ratelimit('follow')
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_user_or_404(username)
     Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:profile', username)
-
-
-def paginator(request, posts):
-    paginator = Paginator(posts, RECORDS_ONE_PAGE)
-    # Из URL извлекаем номер запрошенной страницы - это значение параметра page
-    page_number = request.GET.get('page')
-    # Получаем набор записей для страницы с запрошенным номером
-    page_obj = paginator.get_page(page_number)
-    return page_obj
@@ -0,0 +1,25 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+# Импорт регистрирует стандартную админку пользователей, её и заменяем
+from django.contrib.auth.admin import UserAdmin
+
+from core.admin import BackgroundDeleteMixin
+from posts import deletion
+from posts.models import (Comment, DigestState, Follow, FollowRecommendation,
+                          Post)
+
+User = get_user_model()
+
+
+class BackgroundDeleteUserAdmin(BackgroundDeleteMixin, UserAdmin):
+    list_display = UserAdmin.list_display + ('is_active', 'deletion_status')
+    cascade_models = (
+        Post, Comment, Follow, FollowRecommendation, DigestState
+    )
+
+    def schedule_deletion(self, obj):
+        deletion.schedule_user_deletion(obj)
+
+
+admin.site.unregister(User)
+admin.site.register(User, BackgroundDeleteUserAdmin)
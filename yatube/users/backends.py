@@ -0,0 +1,52 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from yatube.settings import USER_CACHE_TIMEOUT
+
+User = get_user_model()
+
+# Поля, которых хватает для шапки, шаблонов и проверки сессии
+# (хэш пароля нужен для get_session_auth_hash). Model.from_db ждёт
+# значения в порядке полей модели.
+CACHED_FIELDS = tuple(
+    field.attname for field in User._meta.concrete_fields
+    if field.attname in (
+        'id', 'username', 'first_name', 'last_name', 'password',
+        'is_active', 'is_staff', 'is_superuser',
+    )
+)
+
+
+def user_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def forget_user(user_id):
+    cache.delete(user_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который достаёт request.user из кэша.
+
+    Требует общего для всех процессов кэша: сброс записи при смене
+    пароля или блокировке должен дойти до каждого процесса.
+
+    Пользователь восстанавливается с отложенными остальными полями:
+    обращение к ним подгрузит их из базы, а save() запишет только
+    загруженные поля.
+    """
+
+    def get_user(self, user_id):
+        values = cache.get(user_key(user_id))
+        if values is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(
+                    user_key(user_id),
+                    [getattr(user, field) for field in CACHED_FIELDS],
+                    USER_CACHE_TIMEOUT
+                )
+            return user
+        user = User.from_db('default', CACHED_FIELDS, values)
+        return user if self.user_can_authenticate(user) else None
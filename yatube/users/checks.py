@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+BACKEND = 'users.backends.CachedModelBackend'
+LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register()
+def cached_backend_needs_shared_cache(app_configs, **kwargs):
+    """CachedModelBackend с локальным кэшем не видит смены пароля
+    и блокировки, сделанных в других процессах."""
+    if (
+        BACKEND in settings.AUTHENTICATION_BACKENDS
+        and settings.CACHES['default']['BACKEND'] in LOCAL_CACHES
+    ):
+        return [
+            Warning(
+                'CachedModelBackend требует общего для процессов кэша',
+                hint='Задайте CACHE_BACKEND (Memcached, Redis) или '
+                     'используйте ModelBackend.',
+                id='users.W001',
+            )
+        ]
+    return []
@@ -0,0 +1,30 @@
+"""Хэшеры паролей с параметрами из настроек.
+
+Алгоритмы совпадают со стандартными, поэтому уже сохранённые хэши
+проверяются как раньше, а при смене параметров или алгоритма
+пароль пересчитывается при следующем входе (must_update).
+"""
+from django.contrib.auth.hashers import (Argon2PasswordHasher,
+                                         BCryptSHA256PasswordHasher,
+                                         PBKDF2PasswordHasher)
+
+from yatube.settings import (PASSWORD_ARGON2_MEMORY_COST,
+                             PASSWORD_ARGON2_PARALLELISM,
+                             PASSWORD_ARGON2_TIME_COST, PASSWORD_BCRYPT_ROUNDS,
+                             PASSWORD_PBKDF2_ITERATIONS)
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    iterations = PASSWORD_PBKDF2_ITERATIONS
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """Требует пакет argon2-cffi."""
+    time_cost = PASSWORD_ARGON2_TIME_COST
+    memory_cost = PASSWORD_ARGON2_MEMORY_COST
+    parallelism = PASSWORD_ARGON2_PARALLELISM
+
+
+class TunedBCryptSHA256PasswordHasher(BCryptSHA256PasswordHasher):
+    """Требует пакет bcrypt."""
+    rounds = PASSWORD_BCRYPT_ROUNDS
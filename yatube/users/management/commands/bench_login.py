@@ -0,0 +1,32 @@
+import time
+
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Замеряет, сколько проверок пароля в секунду выдерживает одно ядро'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seconds', type=float, default=2.0,
+            help='Длительность замера для каждого алгоритма'
+        )
+
+    def handle(self, *args, **options):
+        for hasher in get_hashers():
+            try:
+                encoded = hasher.encode('benchmark', hasher.salt())
+            except (ValueError, ImportError) as error:
+                self.stdout.write(f'{hasher.algorithm}: пропущен ({error})')
+                continue
+            checks = 0
+            started = time.perf_counter()
+            while time.perf_counter() - started < options['seconds']:
+                hasher.verify('benchmark', encoded)
+                checks += 1
+            rate = checks / (time.perf_counter() - started)
+            self.stdout.write(
+                f'{hasher.algorithm} ({hasher.__class__.__name__}): '
+                f'{rate:.1f} входов/с на ядро'
+            )
@@ -0,0 +1,112 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from .backends import CachedModelBackend
+from .checks import (BACKEND, LOCAL_CACHES,
+                     cached_backend_needs_shared_cache)
+
+User = get_user_model()
+
+
+class CleanupSessionsTests(TestCase):
+    def test_expired_removed_in_batches(self):
+        """Удаляются только истёкшие сессии"""
+        now = timezone.now()
+        for i in range(5):
+            Session.objects.create(
+                session_key=f'old{i}', session_data='',
+                expire_date=now - timedelta(days=1)
+            )
+        Session.objects.create(
+            session_key='fresh', session_data='',
+            expire_date=now + timedelta(days=1)
+        )
+        out = StringIO()
+        call_command('cleanup_sessions', '--batch-size', '2', stdout=out)
+        self.assertIn('5', out.getvalue())
+        self.assertEqual(
+            list(Session.objects.values_list('session_key', flat=True)),
+            ['fresh']
+        )
+
+
+class SharedCacheCheckTests(TestCase):
+    def check(self, cache_backend):
+        caches = {'default': {'BACKEND': cache_backend}}
+        with self.settings(CACHES=caches, AUTHENTICATION_BACKENDS=[BACKEND]):
+            return [w.id for w in cached_backend_needs_shared_cache(None)]
+
+    def test_local_cache_check(self):
+        """Кэширующий бэкенд с локальным кэшем даёт предупреждение"""
+        self.assertEqual(self.check(LOCAL_CACHES[0]), ['users.W001'])
+        self.assertEqual(self.check(LOCAL_CACHES[1]), ['users.W001'])
+
+    def test_shared_cache_check(self):
+        """С общим кэшем предупреждения нет"""
+        self.assertEqual(
+            self.check('django.core.cache.backends.db.DatabaseCache'), []
+        )
+
+
+class CachedUserTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='TestUser', first_name='Имя', email='a@example.com'
+        )
+
+    def test_second_lookup_from_cache(self):
+        """Повторное получение пользователя не обращается к базе"""
+        backend = CachedModelBackend()
+        backend.get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            user = backend.get_user(self.user.pk)
+            self.assertEqual(user.username, 'TestUser')
+            self.assertEqual(user.first_name, 'Имя')
+            self.assertTrue(user.is_active)
+            self.assertEqual(
+                user.get_session_auth_hash(),
+                self.user.get_session_auth_hash()
+            )
+
+    def test_invalidated_on_change(self):
+        """Изменение профиля сбрасывает кэш"""
+        backend = CachedModelBackend()
+        user = backend.get_user(self.user.pk)
+        user.first_name = 'Новое'
+        user.save()
+        self.assertEqual(backend.get_user(self.user.pk).first_name, 'Новое')
+        # save() кэшированного пользователя не затирает остальные поля
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email, 'a@example.com')
+
+    def test_page_uses_cached_user(self):
+        """Авторизованная страница показывает имя из кэша"""
+        self.client.force_login(self.user)
+        self.client.get('/')
+        response = self.client.get('/about/author/')
+        self.assertEqual(response.context['user'].username, 'TestUser')
+
+
+class PasswordUpgradeTests(TestCase):
+    def test_rehash_on_login(self):
+        """Хэш старого формата пересчитывается при входе"""
+        user = User.objects.create(
+            username='old',
+            password=make_password('secret-pass', hasher='pbkdf2_sha1')
+        )
+        self.assertTrue(
+            self.client.login(username='old', password='secret-pass')
+        )
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$'))
+        self.assertTrue(user.check_password('secret-pass'))
@@ -53,6 +53,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -62,6 +63,11 @@ MIDDLEWARE = [
     'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
+# сжатие ответов: минимальный размер тела в байтах
+# и сколько сжатых вариантов хранить в памяти процесса
+COMPRESSION_MIN_LENGTH = 200
+COMPRESSION_CACHE_SIZE = 256
+
 # Добавьте IP адреса, при обращении с которых будет доступен DjDT
 INTERNAL_IPS = [
     '127.0.0.1',
@@ -101,6 +107,79 @@ DATABASES = {
 }
 
 
+# Подключение кеширования бэкенда. LocMemCache годится для разработки,
+# а на боевом сервере обычно используют Memcached или Redis:
+# CACHE_BACKEND=django.core.cache.backends.memcached.MemcachedCache
+# CACHE_LOCATION=127.0.0.1:11211
+CACHE_BACKEND = os.environ.get(
+    'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+)
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
+# Кэш общий для всех процессов сервера. У локального кэша каждый
+# процесс видит только свои сбросы записей.
+SHARED_CACHE = CACHE_BACKEND not in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# request.user берётся из кэша, а не из таблицы auth_user. Смена пароля
+# и блокировка сбрасывают запись, поэтому это безопасно только при общем
+# кэше: иначе другие процессы до USER_CACHE_TIMEOUT пускали бы по старой
+# сессии.
+if SHARED_CACHE:
+    AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
+else:
+    AUTHENTICATION_BACKENDS = ['django.contrib.auth.backends.ModelBackend']
+
+# время жизни пользователя в кэше, секунды
+USER_CACHE_TIMEOUT = 60 * 15
+
+
+# Хэширование паролей: pbkdf2 (по умолчанию), argon2 (нужен argon2-cffi)
+# или bcrypt (нужен bcrypt). Хэши в другом формате или с другими
+# параметрами пересчитываются при входе пользователя.
+# Скорость проверки: python manage.py bench_login
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'pbkdf2')
+# PBKDF2 оставлен со стандартным числом итераций Django 2.2: иначе
+# при первом же всплеске входов все хэши пришлось бы пересчитывать
+PASSWORD_PBKDF2_ITERATIONS = int(
+    os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 150000)
+)
+# argon2 по минимуму OWASP (19 МиБ, 2 прохода, 1 поток): стойкость
+# даёт память, а не процессор, и один вход занимает одно ядро, не
+# отнимая остальные у страниц (стандарт Django - 512 КиБ и 2 потока)
+PASSWORD_ARGON2_TIME_COST = int(
+    os.environ.get('PASSWORD_ARGON2_TIME_COST', 2)
+)
+PASSWORD_ARGON2_MEMORY_COST = int(
+    os.environ.get('PASSWORD_ARGON2_MEMORY_COST', 19 * 1024)
+)
+PASSWORD_ARGON2_PARALLELISM = int(
+    os.environ.get('PASSWORD_ARGON2_PARALLELISM', 1)
+)
+# bcrypt: 10 раундов - минимум OWASP, вчетверо дешевле стандартных 12
+PASSWORD_BCRYPT_ROUNDS = int(os.environ.get('PASSWORD_BCRYPT_ROUNDS', 10))
+
+_PASSWORD_HASHERS = {
+    'pbkdf2': 'users.hashers.TunedPBKDF2PasswordHasher',
+    'argon2': 'users.hashers.TunedArgon2PasswordHasher',
+    'bcrypt': 'users.hashers.TunedBCryptSHA256PasswordHasher',
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    path for name, path in _PASSWORD_HASHERS.items()
+    if name != PASSWORD_HASHER
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptPasswordHasher',
+]
+
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -141,12 +220,31 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
+# сюда collectstatic собирает файлы с хэшами в именах и сжатыми копиями
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+if not DEBUG:
+    STATICFILES_STORAGE = (
+        'core.storage.CompressedManifestStaticFilesStorage'
+    )
+
 
 # личный кабинет
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
+# хранилище сессий: cached_db читает сессию из кэша и пишет в базу
+# только при изменении; signed_cookies не обращается к базе вовсе.
+# С локальным кэшем выход в одном процессе не сбросил бы сессию
+# в кэше других, поэтому по умолчанию там просто db
+SESSION_ENGINE = os.environ.get(
+    'SESSION_ENGINE',
+    'django.contrib.sessions.backends.cached_db' if SHARED_CACHE
+    else 'django.contrib.sessions.backends.db'
+)
+# сессия сохраняется только при изменении данных
+SESSION_SAVE_EVERY_REQUEST = False
+
 
 # почтовый сервер
 
@@ -154,10 +252,89 @@ LOGIN_REDIRECT_URL = 'posts:index'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 # указываем директорию, в которую будут складываться файлы писем
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+DEFAULT_FROM_EMAIL = 'noreply@yatube.ru'
+
+# дайджест новых постов: пользователей в одной пачке
+# и максимум постов в одном письме
+DIGEST_BATCH_SIZE = 200
+DIGEST_MAX_POSTS = 20
 
 # переменная для paginator
 RECORDS_ONE_PAGE = 10
 
+# счётчики постов для пагинатора: ленты меньше этого размера считаются
+# точным COUNT(*), счётчики остальных пересчитываются раз в период (с)
+POST_COUNTER_EXACT_BELOW = 1000
+POST_COUNTER_RECOUNT = 60 * 60
+
+# сколько последних комментариев показывать под постом в списках
+LATEST_COMMENTS_COUNT = 2
+
+# время жизни готового HTML текста постов и комментариев в кэше
+RENDERED_TEXT_TIMEOUT = 60 * 60 * 24
+
+# время жизни закэшированных подписок пользователя; с локальным
+# кэшем другие процессы не видят сброса, поэтому держим недолго
+FOLLOW_GRAPH_TIMEOUT = 60 * 60 if SHARED_CACHE else 10
+
+# сколько рекомендаций "на кого подписаться" хранить и показывать
+RECOMMENDATIONS_STORED = 20
+RECOMMENDATIONS_COUNT = 5
+
+# раздел "Популярное": период полураспада рейтинга в часах,
+# размер списка и время его жизни в кэше
+TRENDING_HALF_LIFE = 12
+TRENDING_COUNT = 10
+TRENDING_CACHE_TIMEOUT = 60
+
+# архив: посты старше ARCHIVE_AFTER_DAYS дней переносятся в архивные
+# таблицы (python manage.py archive_posts) пачками по ARCHIVE_CHUNK_SIZE
+ARCHIVE_AFTER_DAYS = 365
+ARCHIVE_CHUNK_SIZE = 500
+
+# удаление пользователей и групп в фоне: размер пачки и сколько
+# хранить ход законченного удаления
+DELETION_CHUNK_SIZE = 500
+DELETION_PROGRESS_TIMEOUT = 60 * 60 * 24
+
+# сколько секунд админка помнит число записей в списке
+ADMIN_COUNT_TIMEOUT = 60
+
+# каталог групп: сколько активных авторов показывать у группы
+# и время жизни каталога в кэше (сбрасывается при изменении постов;
+# с локальным кэшем сброс виден только своему процессу)
+GROUPS_TOP_AUTHORS = 3
+GROUPS_DIRECTORY_TIMEOUT = 60 * 60 if SHARED_CACHE else 60
+
+# кэш поиска групп по слагу и пользователей по имени: размер и время
+# жизни локального LRU процесса и время жизни записи в общем кэше
+# (с локальным кэшем сброс не виден другим процессам)
+LOOKUP_CACHE_SIZE = 1000
+LOOKUP_LOCAL_TIMEOUT = 30
+LOOKUP_CACHE_TIMEOUT = 60 * 60 if SHARED_CACHE else 30
+
+# очередь фоновых задач (обработчик: python manage.py run_tasks)
+# TASKS_EAGER = True выполняет задачи сразу, без очереди
+TASKS_EAGER = False
+TASKS_MAX_ATTEMPTS = 5
+# задержка перед первым повтором и время аренды задачи, в секундах
+TASKS_RETRY_DELAY = 30
+TASKS_LEASE = 60 * 10
+
+# счётчик просмотров копит прибавки в памяти процесса и пишет их
+# в базу пачкой раз в интервал (секунды) или при переполнении буфера
+VIEW_COUNTS_FLUSH_INTERVAL = 60
+VIEW_COUNTS_MAX_PENDING = 1000
+
+# ограничение частоты запросов: область -> {'user' | 'ip': 'число/период'},
+# период: s, m, h или d
+RATELIMIT_ENABLED = True
+RATELIMITS = {
+    'post_create': {'user': '10/m', 'ip': '30/m'},
+    'add_comment': {'user': '20/m', 'ip': '60/m'},
+    'follow': {'user': '30/m', 'ip': '100/m'},
+}
+
 # имя view функции обрабатывающей ошибку 403
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
@@ -165,11 +342,9 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
-
-# Подключение кеширования бэкенда. Этот бэкенд годится для разработки,
-# а на боевом сервере обычно используют Memcached или Redis.
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
-}
+# без DEBUG медиафайлы отдаёт core.serving.serve_media;
+# MEDIA_SENDFILE = 'x-sendfile' или 'x-accel-redirect' поручает
+# передачу веб-серверу (для nginx: internal location с префиксом ниже)
+MEDIA_SENDFILE = os.environ.get('MEDIA_SENDFILE', '')
+MEDIA_SENDFILE_PREFIX = '/protected-media/'
+MEDIA_MAX_AGE = 60 * 60 * 24 * 30
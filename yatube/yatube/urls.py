@@ -16,7 +16,9 @@ Including another URLconf
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from core.serving import serve_media, serve_static
 
 handler404 = 'core.views.page_not_found'
 handler500 = 'core.views.server_error'
@@ -41,3 +43,8 @@ if settings.DEBUG:
     )
     import debug_toolbar
     urlpatterns += (path('__debug__/', include(debug_toolbar.urls)),)
+else:
+    urlpatterns += [
+        re_path(r'^static/(?P<path>.*)$', serve_static),
+        re_path(r'^media/(?P<path>.*)$', serve_media),
+    ]